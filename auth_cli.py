@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+"""
+Gmail OAuth command line tool
+Creates token.json for the Gmail MCP Server in one of three ways:
+
+  auto       browser login through a local server, falling back to pasting
+             the redirect URL (previously simple_auth.py)
+  manual     paste the code shown after consent, for WSL/headless
+             environments (previously setup_auth.py)
+  from-code  paste the code from a localhost redirect URL
+             (previously manual_token.py)
+"""
+
+import os
+import re
+import sys
+import json
+import argparse
+import urllib.parse
+
+# Gmail API scope
+SCOPES = ['https://www.googleapis.com/auth/gmail.modify']
+TOKEN_PATH = 'token.json'
+CREDENTIALS_PATH = 'credentials.json'
+
+# Authorization code in the query string of a pasted redirect URL
+CODE_PATTERN = re.compile(r'[?&]code=([^&#]+)')
+
+# Fields google-auth needs to rebuild credentials from token.json
+TOKEN_FIELDS = ('refresh_token', 'client_id', 'client_secret')
+
+# Parsed credentials.json, keyed by its modification time
+_client_config_cache = {}
+
+def _looks_like_token(data):
+    """Check a parsed token file has what Credentials needs, without a network call"""
+    return isinstance(data, dict) and all(data.get(field) for field in TOKEN_FIELDS)
+
+def load_client_config():
+    """Parse credentials.json, reusing the last parse while the file is unchanged"""
+    mtime = os.stat(CREDENTIALS_PATH).st_mtime_ns
+    if mtime not in _client_config_cache:
+        with open(CREDENTIALS_PATH, 'r') as f:
+            _client_config_cache.clear()
+            _client_config_cache[mtime] = json.load(f)
+    return _client_config_cache[mtime]
+
+def get_flow(redirect_uri=None):
+    """Create an OAuth flow from credentials.json"""
+    # Only needed for a new login, so a valid token skips the import
+    from google_auth_oauthlib.flow import InstalledAppFlow
+
+    flow = InstalledAppFlow.from_client_config(load_client_config(), SCOPES)
+    if redirect_uri:
+        flow.redirect_uri = redirect_uri
+    return flow
+
+def load_token():
+    """Return the parsed token file and credentials built from it
+
+    Either may be None: the data when there is no readable token file, the
+    credentials when the file is missing fields google-auth needs.
+    """
+    if not os.path.exists(TOKEN_PATH):
+        return None, None
+    with open(TOKEN_PATH, 'r') as token:
+        data = json.load(token)
+    if not _looks_like_token(data):
+        return data, None
+
+    from google.oauth2.credentials import Credentials
+    return data, Credentials.from_authorized_user_info(data, SCOPES)
+
+def save_token(creds, email=None):
+    """Write credentials to TOKEN_PATH, with the account address if known"""
+    data = json.loads(creds.to_json())
+    if email:
+        data['_cached_email'] = email
+    with open(TOKEN_PATH, 'w') as token:
+        json.dump(data, token)
+
+def get_profile(creds):
+    """Fetch the Gmail profile for the authorized account"""
+    from googleapiclient.discovery import build
+
+    service = build('gmail', 'v1', credentials=creds,
+                    static_discovery=True, cache_discovery=False)
+    return service.users().getProfile(userId='me').execute()
+
+def authenticate():
+    """Simple authentication with proper redirect URI"""
+    creds = None
+
+    # Check for existing token
+    data, creds = load_token()
+    if creds:
+        print("✓ Using existing token")
+    elif data is not None:
+        print("Existing token is incomplete, starting a new login")
+
+    # If no valid credentials, start OAuth flow
+    if not creds or not creds.valid:
+        if creds and creds.expired and creds.refresh_token:
+            print("Refreshing expired token...")
+            from google.auth.transport.requests import Request
+            creds.refresh(Request())
+        else:
+            print("Starting OAuth flow...")
+            flow = get_flow()
+
+            # Try local server method first (works in most environments)
+            try:
+                print("Attempting automatic authentication...")
+                print("A browser window should open. If it doesn't, use the URL shown.")
+                creds = flow.run_local_server(
+                    port=8080,
+                    success_message='Authentication successful! You can close this window.',
+                    open_browser=True
+                )
+                print("✓ Authentication successful!")
+            except Exception as e:
+                print(f"\nAutomatic authentication failed: {e}")
+                print("\n" + "="*60)
+                print("MANUAL AUTHENTICATION REQUIRED")
+                print("="*60)
+
+                # Manual flow with proper redirect URI
+                flow.redirect_uri = 'http://localhost:8080'
+
+                # Generate authorization URL
+                auth_url, _ = flow.authorization_url(
+                    access_type='offline',
+                    prompt='consent'
+                )
+
+                print("\n1. Open this URL in your browser:")
+                print(f"\n{auth_url}\n")
+                print("2. Sign in and authorize the application")
+                print("3. You'll see an error page (localhost refused to connect)")
+                print("4. Look at the URL bar - it will contain: http://localhost:8080/?code=...")
+                print("5. Copy the ENTIRE URL from your browser")
+                print("="*60)
+
+                # Get the redirect URL
+                redirect_url = input("\nPaste the entire URL here: ").strip()
+
+                # Parse the authorization code
+                if 'code=' in redirect_url:
+                    # Extract code from URL
+                    match = CODE_PATTERN.search(redirect_url)
+                    auth_code = urllib.parse.unquote(match.group(1)) if match else None
+
+                    if not auth_code:
+                        print("Error: Could not extract authorization code from URL")
+                        return None
+                else:
+                    # Assume they just pasted the code directly
+                    auth_code = redirect_url
+
+                print(f"Using authorization code: {auth_code[:20]}...")
+
+                # Exchange code for token
+                flow.fetch_token(code=auth_code)
+                creds = flow.credentials
+                print("✓ Authentication successful!")
+
+    # Save credentials
+    if creds:
+        save_token(creds, email=data.get('_cached_email') if data else None)
+        print(f"✓ Token saved to {TOKEN_PATH}")
+
+    return creds
+
+def setup_authentication(verify=False):
+    """Set up Gmail OAuth authentication
+
+    A valid existing token is accepted as-is; pass verify=True to also
+    confirm it with a Gmail API call.
+    """
+    print("=" * 70)
+    print("GMAIL MCP SERVER - OAUTH AUTHENTICATION SETUP")
+    print("=" * 70)
+
+    # Check for existing token
+    if os.path.exists(TOKEN_PATH):
+        print(f"✓ Found existing token file: {TOKEN_PATH}")
+
+        # Verify the token works
+        try:
+            creds_data, creds = load_token()
+
+            if creds and creds.valid:
+                print("✓ Existing credentials are valid!")
+                if verify:
+                    profile = get_profile(creds)
+                    print(f"✓ Connected to: {profile['emailAddress']}")
+                    print(f"✓ Total messages: {profile.get('messagesTotal', 0)}")
+                elif creds_data.get('_cached_email'):
+                    print(f"✓ Account: {creds_data['_cached_email']}")
+                print("\n✅ Authentication already set up! No action needed.")
+                return True
+            else:
+                print("⚠ Existing credentials are expired or invalid")
+                print("Starting fresh authentication process...")
+        except Exception as e:
+            print(f"⚠ Error reading existing token: {e}")
+            print("Starting fresh authentication process...")
+
+    # Check for credentials file
+    if not os.path.exists(CREDENTIALS_PATH):
+        print(f"\n❌ Error: Missing {CREDENTIALS_PATH}")
+        print("\nPlease:")
+        print("1. Go to Google Cloud Console (https://console.cloud.google.com)")
+        print("2. Enable the Gmail API")
+        print("3. Create OAuth 2.0 credentials (Desktop Application)")
+        print("4. Download the credentials as 'credentials.json'")
+        print("5. Place credentials.json in this directory")
+        return False
+
+    print(f"✓ Found credentials file: {CREDENTIALS_PATH}")
+
+    # Start manual OAuth flow
+    try:
+        print("\n🔐 Starting OAuth authentication process...")
+        flow = get_flow()
+
+        # Generate authorization URL
+        auth_url, _ = flow.authorization_url(prompt='consent')
+
+        print("\n" + "=" * 70)
+        print("STEP 1: AUTHORIZE IN BROWSER")
+        print("=" * 70)
+        print("Please follow these steps:")
+        print("\n1. Copy this URL and open it in your web browser:")
+        print(f"\n{auth_url}")
+        print("\n2. Sign in to your Google account")
+        print("3. Review and accept the permissions")
+        print("4. Copy the authorization code shown on the success page")
+        print("=" * 70)
+
+        # Get authorization code from user
+        print("\nSTEP 2: ENTER AUTHORIZATION CODE")
+        while True:
+            auth_code = input("\nPaste the authorization code here: ").strip()
+            if auth_code:
+                break
+            print("Please enter a valid authorization code.")
+
+        print("\n🔄 Exchanging authorization code for access token...")
+
+        # Exchange code for credentials
+        flow.fetch_token(code=auth_code)
+        creds = flow.credentials
+
+        # Test the connection
+        print("\n🔍 Testing Gmail API connection...")
+        profile = get_profile(creds)
+
+        # Save credentials, with the address for later runs to show
+        save_token(creds, email=profile['emailAddress'])
+
+        print(f"✅ Credentials saved to {TOKEN_PATH}")
+
+        print("\n" + "=" * 70)
+        print("✅ AUTHENTICATION SUCCESSFUL!")
+        print("=" * 70)
+        print(f"Connected to: {profile['emailAddress']}")
+        print(f"Total messages: {profile.get('messagesTotal', 0)}")
+        print(f"Total threads: {profile.get('threadsTotal', 0)}")
+        print("\nYour Gmail MCP Server is now ready to use!")
+        print("\nNext steps:")
+        print("• Run: python3 gmail_mcp_server.py --test-auth")
+        print("• Or: python3 gmail_mcp_server.py (to start the MCP server)")
+        print("=" * 70)
+
+        return True
+
+    except Exception as e:
+        print(f"\n❌ Authentication failed: {e}")
+
+        print("\n🔧 Troubleshooting tips:")
+        print("• Make sure you copied the complete authorization code")
+        print("• Check your internet connection")
+        print("• Verify the OAuth client is configured as 'Desktop Application'")
+        print("• Ensure the Gmail API is enabled in Google Cloud Console")
+        print("• Try running the setup again")
+
+        return False
+
+def create_token_from_code():
+    """Create token.json from a code copied out of the redirect URL"""
+    print("Manual Token Creation")
+    print("-" * 30)
+
+    # Create flow
+    flow = get_flow(redirect_uri='http://localhost:8080/')
+
+    print("\n1. Open this URL in your browser:")
+    auth_url, _ = flow.authorization_url(
+        access_type='offline',
+        prompt='consent'
+    )
+    print(f"\n{auth_url}\n")
+
+    print("2. After authorizing, copy the authorization code from the URL")
+    print("   (the part after 'code=' in the redirect URL)")
+
+    # Get authorization code from user
+    auth_code = input("\nEnter the authorization code: ").strip()
+
+    # Exchange code for token
+    try:
+        flow.fetch_token(code=auth_code)
+        save_token(flow.credentials)
+
+        print("✅ Token created successfully!")
+        print("You can now run: python3 gmail_mcp_server.py")
+        return True
+
+    except Exception as e:
+        print(f"❌ Error creating token: {e}")
+        return False
+
+def run_auto(args):
+    """Browser login with a manual fallback"""
+    print("Gmail OAuth Authentication Setup")
+    print("-" * 40)
+
+    # Check for credentials file
+    if not os.path.exists(CREDENTIALS_PATH):
+        print(f"ERROR: {CREDENTIALS_PATH} not found!")
+        print("Please download your OAuth client credentials from Google Cloud Console")
+        return False
+
+    # Check credentials format
+    cred_data = load_client_config()
+    if 'installed' not in cred_data:
+        print("ERROR: credentials.json must be a Desktop (installed) client!")
+        print("Current format:", list(cred_data.keys()))
+        print("Please use a Desktop OAuth client from Google Cloud Console")
+        return False
+
+    # Perform authentication
+    creds = authenticate()
+
+    if creds:
+        print("\n✅ Authentication complete!")
+        print("You can now run: python3 gmail_mcp_server.py")
+        return True
+    print("\n❌ Authentication failed!")
+    print("Please check your credentials and try again")
+    return False
+
+def run_manual(args):
+    """Paste-the-code setup for WSL/headless environments"""
+    success = setup_authentication(verify=args.verify)
+    if not success:
+        print("\n❌ Setup failed. Please check the instructions above.")
+    return success
+
+def run_from_code(args):
+    """Token from a code copied out of the redirect URL"""
+    return create_token_from_code()
+
+def main(flow=None):
+    """Main entry point
+
+    flow preselects a subcommand, for the older per-flow scripts that
+    forward here; any remaining command line flags still apply.
+    """
+    parser = argparse.ArgumentParser(description="Gmail MCP Server OAuth setup")
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('auto', help="Browser login with a manual fallback").set_defaults(run=run_auto)
+    manual = commands.add_parser('manual', help="Paste the code shown after consent (WSL/headless)")
+    manual.add_argument(
+        "--verify",
+        action="store_true",
+        help="Check an existing token with a Gmail API call"
+    )
+    manual.set_defaults(run=run_manual)
+    commands.add_parser('from-code', help="Paste the code from the redirect URL").set_defaults(run=run_from_code)
+
+    argv = sys.argv[1:]
+    if flow:
+        argv = [flow, *argv]
+    args = parser.parse_args(argv)
+
+    try:
+        success = args.run(args)
+    except KeyboardInterrupt:
+        print("\n\n⏹ Setup cancelled by user.")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n❌ Unexpected error: {e}")
+        sys.exit(1)
+    if not success:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
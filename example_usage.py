@@ -5,17 +5,50 @@ Demonstrates common Gmail operations
 """
 
 import asyncio
+import os
 import sys
-from pathlib import Path
+from textwrap import shorten
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
 
 # Add parent directory to path for imports
-sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Upper bound on in-flight Gmail API calls, to stay under per-user rate limits
+MAX_CONCURRENT_REQUESTS = 10
+
+
+async def gather_limited(*coros, limit=MAX_CONCURRENT_REQUESTS):
+    """Run coroutines concurrently and return their results in order
+
+    A call that raises is reported as a failed tool result, so callers can
+    keep checking result['success'].
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(coro):
+        async with semaphore:
+            return await coro
+
+    results = await asyncio.gather(*(run(coro) for coro in coros), return_exceptions=True)
+    return [
+        {'success': False, 'error': str(result)} if isinstance(result, Exception) else result
+        for result in results
+    ]
 
-from gmail_mcp_server import GmailMCPServer
+
+async def ainput(prompt):
+    """input() run in a worker thread, so the event loop keeps running"""
+    return await asyncio.get_running_loop().run_in_executor(None, input, prompt)
 
 
 async def demonstrate_gmail_operations():
     """Demonstrate common Gmail operations"""
+    # Imported here so the usage banner prints before the Google API stack loads
+    from gmail_mcp_server import GmailMCPServer
 
     # Initialize the server
     server = GmailMCPServer()
@@ -31,104 +64,118 @@ async def demonstrate_gmail_operations():
         print(f"✗ Authentication failed: {e}")
         return
 
+    try:
+        await report_gmail_overview(await server.tool_functions())
+    finally:
+        server.close()
+
+
+async def report_gmail_overview(tools):
+    """Fetch and print an overview of the mailbox"""
+    # The calls below are independent, so issue them all at once and
+    # report the results afterwards
+    (
+        profile,
+        labels_result,
+        search_result,
+        attachment_search,
+        sent_search,
+        important_search,
+        recent_search,
+    ) = await gather_limited(
+        tools['get_profile'](),
+        tools['list_labels'](),
+        tools['search_emails'](query="is:unread", max_results=5),
+        tools['search_emails'](query="has:attachment", max_results=3),
+        tools['search_emails'](query="in:sent", max_results=3),
+        tools['search_emails'](query="is:important", max_results=2),
+        tools['search_emails'](query="newer_than:7d from:gmail.com", max_results=2),
+    )
+
+    # Build the report in memory and write it out in one go
+    out = []
+
     # Get profile information
-    print("\n📊 Getting profile information...")
-    profile = await server.get_profile()
+    out.append("\n📊 Getting profile information...")
     if profile['success']:
-        print(f"✓ Email: {profile['emailAddress']}")
-        print(f"✓ Total messages: {profile['messagesTotal']}")
-        print(f"✓ Total threads: {profile['threadsTotal']}")
+        out.append(f"✓ Email: {profile['emailAddress']}")
+        out.append(f"✓ Total messages: {profile['messagesTotal']}")
+        out.append(f"✓ Total threads: {profile['threadsTotal']}")
 
     # List existing labels
-    print("\n🏷️  Listing Gmail labels...")
-    labels_result = await server.list_labels()
+    out.append("\n🏷️  Listing Gmail labels...")
     if labels_result['success']:
-        print(f"✓ Found {labels_result['count']} labels:")
+        out.append(f"✓ Found {labels_result['count']} labels:")
         for label in labels_result['labels'][:5]:  # Show first 5
-            print(f"   - {label['name']} ({label['type']})")
+            out.append(f"   - {label['name']} ({label['type']})")
 
     # Search for unread emails
-    print("\n🔍 Searching for unread emails...")
-    search_result = await server.search_emails(
-        query="is:unread",
-        max_results=5
-    )
+    out.append("\n🔍 Searching for unread emails...")
     if search_result['success']:
-        print(f"✓ Found {search_result['count']} unread emails:")
-        for email in search_result['emails']:
-            print(f"   From: {email['from'][:50]}...")
-            print(f"   Subject: {email['subject'][:50]}...")
-            print(f"   Date: {email['date']}")
-            print()
+        out.append(f"✓ Found {search_result['count']} unread emails:")
+        out.extend(
+            f"   From: {shorten(email['from'], 50, placeholder='...')}\n"
+            f"   Subject: {shorten(email['subject'], 50, placeholder='...')}\n"
+            f"   Date: {email['date']}\n"
+            for email in search_result['emails']
+        )
 
     # Search for emails with attachments
-    print("\n📎 Searching for emails with attachments...")
-    attachment_search = await server.search_emails(
-        query="has:attachment",
-        max_results=3
-    )
+    out.append("\n📎 Searching for emails with attachments...")
     if attachment_search['success']:
-        print(f"✓ Found {attachment_search['count']} emails with attachments")
+        out.append(f"✓ Found {attachment_search['count']} emails with attachments")
 
     # Search in sent folder
-    print("\n📤 Checking sent emails...")
-    sent_search = await server.search_emails(
-        query="in:sent",
-        max_results=3
-    )
+    out.append("\n📤 Checking sent emails...")
     if sent_search['success']:
-        print(f"✓ Found {sent_search['count']} sent emails")
+        out.append(f"✓ Found {sent_search['count']} sent emails")
 
     # Create a test label (optional - uncomment to test)
-    # print("\n🆕 Creating test label...")
+    # out.append("\n🆕 Creating test label...")
     # from datetime import datetime
     # test_label = f"MCP_Example_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-    # label_result = await server.create_label(name=test_label)
+    # label_result = await tools['create_label'](name=test_label)
     # if label_result['success']:
-    #     print(f"✓ Created label: {label_result['name']}")
+    #     out.append(f"✓ Created label: {label_result['name']}")
 
     # Create a draft email (optional - uncomment to test)
-    # print("\n✉️  Creating test draft...")
+    # out.append("\n✉️  Creating test draft...")
     # if profile['success']:
-    #     draft_result = await server.create_draft(
+    #     draft_result = await tools['create_draft'](
     #         to=profile['emailAddress'],  # Send to self
     #         subject="Gmail MCP Server Test Draft",
     #         body="This is a test draft created by the Gmail MCP Server example script.\n\nYou can safely delete this draft.",
     #         html=False
     #     )
     #     if draft_result['success']:
-    #         print(f"✓ Draft created with ID: {draft_result['draftId']}")
+    #         out.append(f"✓ Draft created with ID: {draft_result['draftId']}")
 
     # Advanced search examples
-    print("\n🎯 Advanced search examples...")
+    out.append("\n🎯 Advanced search examples...")
 
     # Search for important emails
-    important_search = await server.search_emails(
-        query="is:important",
-        max_results=2
-    )
     if important_search['success']:
-        print(f"✓ Found {important_search['count']} important emails")
+        out.append(f"✓ Found {important_search['count']} important emails")
 
     # Search for recent emails from a specific domain
-    recent_search = await server.search_emails(
-        query="newer_than:7d from:gmail.com",
-        max_results=2
-    )
     if recent_search['success']:
-        print(f"✓ Found {recent_search['count']} recent emails from gmail.com")
+        out.append(f"✓ Found {recent_search['count']} recent emails from gmail.com")
+
+    out.append("\n" + "=" * 50)
+    out.append("🎉 Example completed successfully!")
+    out.append("\nNext steps:")
+    out.append("1. Review the code in example_usage.py")
+    out.append("2. Uncomment optional sections to test draft creation")
+    out.append("3. Run test_gmail_mcp.py for interactive testing")
+    out.append("4. Read SETUP_GUIDE.md for advanced configuration")
 
-    print("\n" + "=" * 50)
-    print("🎉 Example completed successfully!")
-    print("\nNext steps:")
-    print("1. Review the code in example_usage.py")
-    print("2. Uncomment optional sections to test draft creation")
-    print("3. Run test_gmail_mcp.py for interactive testing")
-    print("4. Read SETUP_GUIDE.md for advanced configuration")
+    sys.stdout.write("\n".join(out) + "\n")
 
 
 async def interactive_example():
     """Interactive example with user prompts"""
+    from gmail_mcp_server import GmailMCPServer
+
     server = GmailMCPServer()
 
     print("🤖 Interactive Gmail MCP Server Example")
@@ -142,15 +189,14 @@ async def interactive_example():
         print(f"✗ Authentication failed: {e}")
         return
 
-    # Get user's email
-    profile = await server.get_profile()
-    if not profile['success']:
-        print("✗ Could not get profile")
-        return
+    try:
+        await interactive_menu(await server.tool_functions())
+    finally:
+        server.close()
 
-    user_email = profile['emailAddress']
-    print(f"✓ Authenticated as: {user_email}")
 
+async def interactive_menu(tools):
+    """Prompt for one operation and run it"""
     # Ask what they want to do
     print("\nWhat would you like to do?")
     print("1. Search emails")
@@ -159,32 +205,49 @@ async def interactive_example():
     print("4. Create a label")
     print("5. Show profile info")
 
-    choice = input("\nEnter choice (1-5): ").strip()
+    # Speculatively fetch the data for the most common choices while the
+    # user is still deciding; it is simply discarded if they pick otherwise
+    choice, labels_result, unread_result = await asyncio.gather(
+        ainput("\nEnter choice (1-5): "),
+        tools['list_labels'](),
+        tools['search_emails'](query="is:unread", max_results=10)
+    )
+    choice = choice.strip()
 
     if choice == "1":
         query = input("Enter search query (e.g., 'is:unread', 'from:someone@example.com'): ").strip()
         if query:
-            result = await server.search_emails(query=query, max_results=10)
+            if query == "is:unread":
+                result = unread_result
+            else:
+                result = await tools['search_emails'](query=query, max_results=10)
             if result['success']:
                 print(f"\n✓ Found {result['count']} emails:")
-                for email in result['emails']:
-                    print(f"\n  From: {email['from']}")
-                    print(f"  Subject: {email['subject']}")
-                    print(f"  Date: {email['date']}")
-                    print(f"  Snippet: {email['snippet'][:100]}...")
+                sys.stdout.write("".join(
+                    f"\n  From: {email['from']}\n"
+                    f"  Subject: {email['subject']}\n"
+                    f"  Date: {email['date']}\n"
+                    f"  Snippet: {shorten(email['snippet'], 100, placeholder='...')}\n"
+                    for email in result['emails']
+                ))
             else:
                 print(f"✗ Search failed: {result['error']}")
 
     elif choice == "2":
         to = input("To (leave empty to send to yourself): ").strip()
         if not to:
-            to = user_email
+            # Only look up our own address when it is actually needed
+            profile = await tools['get_profile']()
+            if not profile['success']:
+                print("✗ Could not get profile")
+                return
+            to = profile['emailAddress']
 
         subject = input("Subject: ").strip()
         body = input("Message body: ").strip()
 
         if subject and body:
-            result = await server.create_draft(to=to, subject=subject, body=body)
+            result = await tools['create_draft'](to=to, subject=subject, body=body)
             if result['success']:
                 print(f"✓ Draft created successfully!")
                 print(f"  Draft ID: {result['draftId']}")
@@ -194,7 +257,7 @@ async def interactive_example():
             print("✗ Subject and body are required")
 
     elif choice == "3":
-        result = await server.list_labels()
+        result = labels_result
         if result['success']:
             print(f"\n✓ Found {result['count']} labels:")
             for label in result['labels']:
@@ -205,7 +268,7 @@ async def interactive_example():
     elif choice == "4":
         name = input("Label name (use '/' for nested labels): ").strip()
         if name:
-            result = await server.create_label(name=name)
+            result = await tools['create_label'](name=name)
             if result['success']:
                 print(f"✓ Label '{result['name']}' created successfully!")
                 print(f"  Label ID: {result['labelId']}")
@@ -215,6 +278,11 @@ async def interactive_example():
             print("✗ Label name is required")
 
     elif choice == "5":
+        profile = await tools['get_profile']()
+        if not profile['success']:
+            print(f"✗ Could not get profile: {profile['error']}")
+            return
+
         print(f"\n📊 Profile Information:")
         print(f"  Email: {profile['emailAddress']}")
         print(f"  Total Messages: {profile['messagesTotal']}")
@@ -241,8 +309,11 @@ if __name__ == "__main__":
     print("  python example_usage.py --interactive # Interactive mode")
     print()
 
+    # Use the libuv-based event loop when it is installed
+    run = uvloop.run if uvloop else asyncio.run
+
     try:
-        asyncio.run(main())
+        run(main())
     except KeyboardInterrupt:
         print("\n\nExample interrupted by user")
     except Exception as e:
@@ -7,37 +7,96 @@ This script helps diagnose and fix OAuth authentication issues
 import os
 import json
 import sys
-from pathlib import Path
-from google.oauth2.credentials import Credentials
-from google.auth.transport.requests import Request
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlparse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 SCOPES = ['https://www.googleapis.com/auth/gmail.modify']
 
+# A token with at least this much lifetime left is used as-is
+TOKEN_FRESH_MARGIN = timedelta(minutes=10)
+
+# How many times a mistyped authorization code may be re-entered
+MAX_CODE_ATTEMPTS = 3
+
+# A real OAuth client file is a few hundred bytes; anything outside these
+# bounds is reported without being parsed
+CREDENTIALS_MIN_SIZE = 100
+CREDENTIALS_MAX_SIZE = 10_000_000
+
+# Parsed JSON files, keyed by path -> ((mtime_ns, size), data)
+_json_cache = {}
+
+def _load_json_cached(path):
+    """Load a JSON file, reusing the parsed result while the file is unchanged"""
+    st = os.stat(path)
+    key = (st.st_mtime_ns, st.st_size)
+    cached = _json_cache.get(path)
+    if cached and cached[0] == key:
+        return cached[1]
+
+    with open(path, 'rb') as f:
+        raw = f.read()
+    data = orjson.loads(raw) if orjson else json.loads(raw)
+    _json_cache[path] = (key, data)
+    return data
+
+def _dump_json(data):
+    """Serialize data to compact, newline-terminated JSON bytes"""
+    if orjson:
+        return orjson.dumps(data, option=orjson.OPT_APPEND_NEWLINE)
+    return json.dumps(data, separators=(',', ':')).encode('utf-8') + b'\n'
+
+def _creds_to_dict(creds):
+    """Token fields in the layout Credentials.from_authorized_user_info reads
+
+    Taken from creds.to_json() so every field google-auth saves (the reauth
+    proof, universe domain and account among them) survives the rewrite.
+    """
+    return json.loads(creds.to_json())
+
+def _redirect_port(client_config):
+    """Port of the first registered localhost redirect URI, or 0 for any free port"""
+    client_info = client_config.get('installed') or client_config.get('web') or {}
+    for uri in client_info.get('redirect_uris', []):
+        parsed = urlparse(uri)
+        if parsed.hostname in ('localhost', '127.0.0.1') and parsed.port:
+            return parsed.port
+    return 0
+
 def check_credentials_file():
     """Check and validate credentials.json file"""
-    print("\n=== Checking credentials.json ===")
-
-    if not os.path.exists('credentials.json'):
-        print("❌ credentials.json not found!")
-        print("   Please download it from Google Cloud Console")
-        return False
+    report = ["\n=== Checking credentials.json ==="]
 
+    # Collect the report and print it in one write, whichever way we exit
     try:
-        with open('credentials.json', 'r') as f:
-            creds = json.load(f)
+        try:
+            size = os.stat('credentials.json').st_size
+        except FileNotFoundError:
+            report.append("❌ credentials.json not found!")
+            report.append("   Please download it from Google Cloud Console")
+            return False
+
+        if not CREDENTIALS_MIN_SIZE <= size <= CREDENTIALS_MAX_SIZE:
+            report.append(f"❌ credentials.json size looks wrong ({size} bytes)")
+            report.append("   Please download it again from Google Cloud Console")
+            return False
+
+        creds = _load_json_cached('credentials.json')
 
         # Check structure
         if 'installed' in creds:
-            print("✅ Desktop application OAuth client detected")
+            report.append("✅ Desktop application OAuth client detected")
             client_info = creds['installed']
         elif 'web' in creds:
-            print("✅ Web application OAuth client detected")
+            report.append("✅ Web application OAuth client detected")
             client_info = creds['web']
         else:
-            print("❌ Unknown OAuth client type")
+            report.append("❌ Unknown OAuth client type")
             return False
 
         # Validate required fields
@@ -45,43 +104,56 @@ def check_credentials_file():
         missing = [f for f in required_fields if f not in client_info]
 
         if missing:
-            print(f"❌ Missing required fields: {', '.join(missing)}")
+            report.append(f"❌ Missing required fields: {', '.join(missing)}")
             return False
 
-        print(f"✅ Client ID: {client_info['client_id'][:30]}...")
-        print(f"✅ Project ID: {client_info.get('project_id', 'Not specified')}")
+        report.append(f"✅ Client ID: {client_info['client_id'][:30]}...")
+        report.append(f"✅ Project ID: {client_info.get('project_id', 'Not specified')}")
 
         # Check redirect URIs
         redirect_uris = client_info.get('redirect_uris', [])
         if not redirect_uris:
-            print("⚠️  No redirect URIs found - this might cause issues")
+            report.append("⚠️  No redirect URIs found - this might cause issues")
         else:
-            print(f"✅ Redirect URIs configured: {len(redirect_uris)}")
+            report.append(f"✅ Redirect URIs configured: {len(redirect_uris)}")
             for uri in redirect_uris[:3]:  # Show first 3
-                print(f"   - {uri}")
+                report.append(f"   - {uri}")
 
         return True
 
     except json.JSONDecodeError as e:
-        print(f"❌ Invalid JSON in credentials.json: {e}")
+        report.append(f"❌ Invalid JSON in credentials.json: {e}")
         return False
     except Exception as e:
-        print(f"❌ Error reading credentials.json: {e}")
+        report.append(f"❌ Error reading credentials.json: {e}")
         return False
+    finally:
+        print("\n".join(report))
 
 def test_authentication_flow():
     """Test the OAuth authentication flow"""
+    # The Google auth stack is slow to import, so only load it once the
+    # credentials file has passed its checks
+    from google.oauth2.credentials import Credentials
+    from google.auth.transport.requests import Request
+    from google_auth_oauthlib.flow import InstalledAppFlow
+    from oauthlib.oauth2.rfc6749.errors import InvalidGrantError
+
     print("\n=== Testing Authentication Flow ===")
 
     try:
         # Try to load existing token
         if os.path.exists('token.json'):
             print("Found existing token.json, checking validity...")
-            with open('token.json', 'r') as token:
-                creds_data = json.load(token)
-                creds = Credentials.from_authorized_user_info(creds_data, SCOPES)
+            creds_data = _load_json_cached('token.json')
+            creds = Credentials.from_authorized_user_info(creds_data, SCOPES)
 
-            if creds and creds.valid:
+            # google-auth stores expiry as a naive UTC datetime
+            now = datetime.now(timezone.utc).replace(tzinfo=None)
+            if creds.token and creds.expiry and creds.expiry - now > TOKEN_FRESH_MARGIN:
+                print("✅ Existing token is valid!")
+                return test_gmail_connection(creds)
+            elif creds and creds.valid:
                 print("✅ Existing token is valid!")
                 return test_gmail_connection(creds)
             elif creds and creds.expired and creds.refresh_token:
@@ -99,17 +171,19 @@ def test_authentication_flow():
         print("\n Starting new authentication flow...")
         print("=" * 60)
 
-        flow = InstalledAppFlow.from_client_secrets_file(
-            'credentials.json', SCOPES)
+        # Reuse the client config already parsed by check_credentials_file
+        client_config = _load_json_cached('credentials.json')
+        flow = InstalledAppFlow.from_client_config(client_config, SCOPES)
 
         # Try different authentication methods
         print("\nAttempting automatic browser authentication...")
         print("(If a browser doesn't open, we'll fall back to manual mode)")
 
         try:
-            # Try automatic flow with port 0 (random available port)
+            # Listen on the port of a registered redirect URI so Google
+            # accepts the redirect; fall back to a random free port
             creds = flow.run_local_server(
-                port=0,
+                port=_redirect_port(client_config),
                 authorization_prompt_message='Please visit this URL to authorize: {url}',
                 success_message='Authentication successful! You can close this window.',
                 open_browser=True
@@ -137,18 +211,30 @@ def test_authentication_flow():
             print("5. Paste it below")
             print("=" * 60)
 
-            auth_code = input("\nEnter authorization code: ").strip()
+            # A rejected code can be retried against the same flow and URL
+            creds = None
+            for attempt in range(1, MAX_CODE_ATTEMPTS + 1):
+                auth_code = input("\nEnter authorization code: ").strip()
 
-            if not auth_code:
-                print("❌ No authorization code provided")
-                return False
+                if not auth_code:
+                    print("❌ No authorization code provided")
+                    return False
 
-            try:
-                flow.fetch_token(code=auth_code)
-                creds = flow.credentials
-                print("✅ Manual authentication successful!")
-            except Exception as e:
-                print(f"❌ Failed to exchange authorization code: {e}")
+                try:
+                    flow.fetch_token(code=auth_code)
+                    creds = flow.credentials
+                    print("✅ Manual authentication successful!")
+                    break
+                except InvalidGrantError as e:
+                    print(f"❌ Authorization code was rejected: {e}")
+                    if attempt < MAX_CODE_ATTEMPTS:
+                        print("Please try again. The authorization URL is unchanged:\n")
+                        print(auth_url)
+                except Exception as e:
+                    print(f"❌ Failed to exchange authorization code: {e}")
+                    return False
+
+            if creds is None:
                 return False
 
         # Save credentials
@@ -169,29 +255,41 @@ def test_authentication_flow():
 def save_token(creds):
     """Save credentials to token.json"""
     try:
-        with open('token.json', 'w') as token:
-            token.write(creds.to_json())
+        # Write to a temporary file and swap it in, so an interrupted write
+        # can never leave a truncated token.json behind
+        with open('token.json.tmp', 'wb') as token:
+            token.write(_dump_json(_creds_to_dict(creds)))
+        os.replace('token.json.tmp', 'token.json')
         print("✅ Token saved to token.json")
     except Exception as e:
         print(f"⚠️  Failed to save token: {e}")
 
 def test_gmail_connection(creds):
     """Test the Gmail API connection"""
+    from googleapiclient.discovery import build
+    from googleapiclient.errors import HttpError
+
     print("\n=== Testing Gmail API Connection ===")
 
     try:
-        service = build('gmail', 'v1', credentials=creds)
+        # Use the Gmail discovery document bundled with googleapiclient
+        # rather than fetching it (cache_discovery only applies to fetched docs)
+        service = build('gmail', 'v1', credentials=creds,
+                        static_discovery=True, cache_discovery=False)
 
         # Get user profile
-        profile = service.users().getProfile(userId='me').execute()
+        profile = service.users().getProfile(
+            userId='me',
+            fields='emailAddress,messagesTotal,threadsTotal'
+        ).execute()
 
         print("✅ Successfully connected to Gmail!")
         print(f"   Email: {profile['emailAddress']}")
         print(f"   Total messages: {profile.get('messagesTotal', 0)}")
         print(f"   Total threads: {profile.get('threadsTotal', 0)}")
 
-        # Try to list some labels as additional test
-        labels = service.users().labels().list(userId='me').execute()
+        # Try to list some labels as additional test (only the count is used)
+        labels = service.users().labels().list(userId='me', fields='labels/id').execute()
         print(f"   Available labels: {len(labels.get('labels', []))}")
 
         return True
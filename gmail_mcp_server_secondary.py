@@ -8,26 +8,53 @@ import os
 import sys
 import json
 import base64
+import binascii
 import mimetypes
+import mmap
 import asyncio
-import argparse
+import random
+import queue
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from typing import Dict, List, Any, Optional
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
 # MCP imports
 from fastmcp import FastMCP
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import pybase64
+except ImportError:
+    pybase64 = None
+
 # Google API imports
+import httplib2
 from google.oauth2.credentials import Credentials
+from google_auth_httplib2 import AuthorizedHttp
 from google.auth.transport.requests import Request
 from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
+from googleapiclient.discovery import build, build_from_document
 from googleapiclient.errors import HttpError
+from googleapiclient.http import MediaIoBaseUpload, set_user_agent
+from googleapiclient.model import JsonModel
+from email.generator import BytesGenerator
+from email.header import Header
+from email.message import EmailMessage
+from email.policy import SMTP
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.base import MIMEBase
-from email import encoders
 
 # Gmail API scope - full access to Gmail
 SCOPES = ['https://www.googleapis.com/auth/gmail.modify']
@@ -40,11 +67,134 @@ SCRIPT_DIR = Path(__file__).parent.absolute()
 TOKEN_PATH = SCRIPT_DIR / 'token_secondary.json'
 CREDENTIALS_PATH = SCRIPT_DIR / 'credentials_secondary.json'
 
+# Gmail discovery document trimmed to the API methods this server calls.
+# Add any newly used method to it, or delete it to use the full document
+DISCOVERY_PATH = SCRIPT_DIR / 'gmail_v1_min.json'
+
+# Local cache of message metadata returned by search_emails
+CACHE_PATH = SCRIPT_DIR / 'gmail_cache_secondary.sqlite'
+
+# Calls per batch request. Gmail accepts up to 100, but recommends at most
+# 50: larger batches tend to be rate limited, and every rate-limited call
+# then has to be retried on its own
+BATCH_SIZE = 50
+
+# Message IDs Gmail accepts in a single batchModify call
+BATCH_MODIFY_LIMIT = 1000
+
+# How long (seconds) read_email waits to gather concurrent message fetches
+# into a single batch request
+GET_BATCH_WINDOW = 0.01
+
+# Batch requests a single call may have in flight at once
+MAX_CONCURRENT_BATCHES = 5
+
+# Worker threads for blocking Gmail I/O, kept apart from asyncio's default
+# executor so a burst of searches can't starve other work
+GMAIL_WORKERS = 10
+
+# Retries, with jittered exponential backoff, for rate-limited (429) or
+# failed (5xx) requests; Gmail's Retry-After is honoured when it sends one.
+# A 5xx may arrive after the request took effect, so calls that create
+# something (sending mail, new drafts, labels and filters) only retry 429s
+NUM_RETRIES = 4
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+RATE_LIMIT_STATUSES = (429,)
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 32
+
+# Attachments are base64-encoded this many bytes at a time. A
+# multiple of 57 keeps every encoded line at the 76 characters MIME allows
+ATTACHMENT_CHUNK_SIZE = 57 * 1024
+
+# Messages with attachments are spooled to disk past this size and uploaded
+# in chunks of the same size (resumable uploads need a multiple of 256 KB)
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# How often (seconds) the running server checks its access token, and how
+# close to expiry it refreshes it ahead of time
+TOKEN_CHECK_INTERVAL = 300
+TOKEN_REFRESH_MARGIN = timedelta(minutes=10)
+
+# How long (seconds) list_labels and get_profile reuse their last result.
+# Labels rarely change; profile totals move with every new message
+LABEL_CACHE_TTL = 300
+PROFILE_CACHE_TTL = 30
+
+# Socket timeout (seconds) for the shared Gmail HTTP connection
+HTTP_TIMEOUT = 60
+
+# Google only gzips responses for clients whose user agent contains "gzip".
+# googleapiclient adds it to single requests but not to batch requests
+USER_AGENT = 'gmail-mcp-server (gzip)'
+
+# Headers fetched for search results and for the message being replied to.
+# These stay lists: googleapiclient only expands a repeated parameter given
+# as a list, and sends anything else as a single stringified value
+METADATA_HEADERS = ['From', 'To', 'Subject', 'Date']
+REPLY_HEADERS = ['From', 'To', 'Subject', 'Message-ID']
+
+# Headers get_thread returns for each message
+SUMMARY_HEADERS = frozenset(METADATA_HEADERS)
+
+# Leading reply prefixes ("Re: ", "RE:", "Re: Re: ") stripped before replying
+REPLY_PREFIX = re.compile(r'^(?:re:\s*)+', re.IGNORECASE)
+
+# Maps standard base64 to the URL-safe alphabet Gmail expects for raw messages
+B64_URLSAFE = bytes.maketrans(b'+/', b'-_')
+
+# Partial-response masks: only ask Gmail for the fields we return
+LABEL_FIELDS = 'labels(id,name,type,messageListVisibility,labelListVisibility)'
+PROFILE_FIELDS = 'emailAddress,messagesTotal,threadsTotal,historyId'
+SEARCH_MESSAGE_FIELDS = 'id,threadId,snippet,labelIds,internalDate,payload/headers'
+
+def _urlsafe_b64encode(data):
+    """Encode bytes as the URL-safe base64 text Gmail expects in 'raw' fields"""
+    if pybase64:
+        return pybase64.urlsafe_b64encode(data).decode('ascii')
+    return binascii.b2a_base64(data, newline=False).translate(B64_URLSAFE).decode('ascii')
+
+def _urlsafe_b64decode(data):
+    """Decode URL-safe base64 message bodies and attachments from Gmail"""
+    if pybase64:
+        return pybase64.urlsafe_b64decode(data)
+    return base64.urlsafe_b64decode(data)
+
+# Transport for token refreshes, shared by startup and the background
+# refresher so each refresh reuses one requests session
+REFRESH_REQUEST = Request()
+
+def _authorized_http(creds):
+    """Create an authorized transport that asks for gzipped responses"""
+    return set_user_agent(AuthorizedHttp(creds, http=httplib2.Http(timeout=HTTP_TIMEOUT)), USER_AGENT)
+
+class _OrjsonModel(JsonModel):
+    """JsonModel that parses Gmail API responses with orjson"""
+
+    def deserialize(self, content):
+        try:
+            body = orjson.loads(content)
+        except orjson.JSONDecodeError:
+            return super().deserialize(content)
+        if self._data_wrapper and isinstance(body, dict) and 'data' in body:
+            body = body['data']
+        return body
+
 class GmailMCPServer:
     """Gmail MCP Server implementation"""
 
     def __init__(self):
         self.service = None
+        self.http = None
+        self._http_pool = queue.LifoQueue()
+        self._executor = None
+        self._cache = None
+        self._refresh_stop = None
+        self._get_queue = None
+        self._get_batcher = None
+        self._get_fetches = set()
+        self._labels_cache = None
+        self._profile_cache = None
         self.mcp = FastMCP("Gmail MCP Server (Secondary)")
         self._setup_handlers()
 
@@ -53,16 +203,16 @@ class GmailMCPServer:
         creds = None
 
         # Load existing token
-        if os.path.exists(TOKEN_PATH):
-            with open(TOKEN_PATH, 'r') as token:
-                creds_data = json.load(token)
-                creds = Credentials.from_authorized_user_info(creds_data, SCOPES)
+        if TOKEN_PATH.exists():
+            raw = TOKEN_PATH.read_bytes()
+            creds_data = orjson.loads(raw) if orjson else json.loads(raw)
+            creds = Credentials.from_authorized_user_info(creds_data, SCOPES)
 
         # If there are no (valid) credentials available, let the user log in
         if not creds or not creds.valid:
-            if creds and creds.expired and creds.refresh_token:
+            if creds and creds.refresh_token:
                 print("Refreshing expired credentials...", file=sys.stderr)
-                creds.refresh(Request())
+                creds.refresh(REFRESH_REQUEST)
             else:
                 if not os.path.exists(CREDENTIALS_PATH):
                     raise FileNotFoundError(
@@ -120,13 +270,96 @@ class GmailMCPServer:
                         return self.authenticate(manual_auth=True)
 
             # Save the credentials for the next run
-            with open(TOKEN_PATH, 'w') as token:
-                token.write(creds.to_json())
-                print(f"[OK] Credentials saved to {TOKEN_PATH}", file=sys.stderr)
-
-        self.service = build('gmail', 'v1', credentials=creds)
+            self._save_token(creds)
+            print(f"[OK] Credentials saved to {TOKEN_PATH}", file=sys.stderr)
+
+        # One authorized transport for the lifetime of the server, so every
+        # API call reuses the same keep-alive TLS connection to Gmail
+        self.close()
+        self.http = _authorized_http(creds)
+        # Build from the trimmed discovery document, falling back to the one
+        # bundled with googleapiclient; neither needs a fetch from googleapis.com
+        model = _OrjsonModel() if orjson else None
+        if DISCOVERY_PATH.exists():
+            self.service = build_from_document(
+                DISCOVERY_PATH.read_text(encoding='utf-8'), http=self.http, model=model)
+        else:
+            self.service = build('gmail', 'v1', http=self.http,
+                                 static_discovery=True, cache_discovery=False,
+                                 model=model)
         return True
 
+    def close(self):
+        """Close the Gmail transport connections and the message cache"""
+        if self._refresh_stop is not None:
+            self._refresh_stop.set()
+            self._refresh_stop = None
+        if self.http is not None:
+            self.http.http.close()
+            self.http = None
+        while not self._http_pool.empty():
+            self._http_pool.get_nowait().http.close()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        if self._cache is not None:
+            self._cache.close()
+            self._cache = None
+        self._labels_cache = None
+        self._profile_cache = None
+
+    async def tool_functions(self):
+        """Map each tool's name to its function, for calling tools directly
+
+        FastMCP 2.x lists tools with get_tools(); from 3.0 list_tools()
+        returns the tools themselves rather than their MCP descriptions.
+        """
+        if hasattr(self.mcp, 'get_tools'):
+            tools = (await self.mcp.get_tools()).values()
+        else:
+            tools = await self.mcp.list_tools()
+        return {tool.name: tool.fn for tool in tools}
+
+    def _save_token(self, creds):
+        """Write credentials to the token file
+
+        The token goes to a temporary file that then replaces TOKEN_PATH, so
+        an interrupted write can never leave a truncated token behind.
+        """
+        tmp_path = TOKEN_PATH.with_name(TOKEN_PATH.name + '.tmp')
+        with open(tmp_path, 'w') as token:
+            token.write(creds.to_json())
+        os.replace(tmp_path, TOKEN_PATH)
+
+    def _start_token_refresher(self):
+        """Refresh the access token in the background before it expires
+
+        Otherwise the first tool call after expiry pays for the OAuth
+        refresh round trip itself.
+        """
+        self._refresh_stop = threading.Event()
+        threading.Thread(
+            target=self._refresh_token_loop,
+            args=(self.http.credentials, self._refresh_stop),
+            name='gmail-token-refresh',
+            daemon=True
+        ).start()
+
+    def _refresh_token_loop(self, creds, stop):
+        """Body of the background refresh thread; runs until stop is set"""
+        while not stop.wait(TOKEN_CHECK_INTERVAL):
+            if not creds.refresh_token or not creds.expiry:
+                continue
+            # google-auth stores expiry as a naive UTC datetime
+            now = datetime.now(timezone.utc).replace(tzinfo=None)
+            if creds.expiry - now > TOKEN_REFRESH_MARGIN:
+                continue
+            try:
+                creds.refresh(REFRESH_REQUEST)
+                self._save_token(creds)
+            except Exception as e:
+                print(f"Background token refresh failed: {e}", file=sys.stderr)
+
     def _setup_handlers(self):
         """Setup all MCP handlers"""
 
@@ -156,40 +389,56 @@ class GmailMCPServer:
                 Dict with message ID and thread ID
             """
             try:
-                message = MIMEMultipart() if attachments else MIMEText(body, 'html' if html else 'plain')
-
                 if attachments:
+                    message = MIMEMultipart()
                     message.attach(MIMEText(body, 'html' if html else 'plain'))
                     for file_path in attachments:
                         if os.path.isfile(file_path):
-                            with open(file_path, 'rb') as f:
-                                mime_type, _ = mimetypes.guess_type(file_path)
-                                if mime_type:
-                                    main_type, sub_type = mime_type.split('/')
-                                else:
-                                    main_type, sub_type = 'application', 'octet-stream'
-
-                                attachment = MIMEBase(main_type, sub_type)
-                                attachment.set_payload(f.read())
-                                encoders.encode_base64(attachment)
-                                attachment.add_header(
-                                    'Content-Disposition',
-                                    f'attachment; filename="{os.path.basename(file_path)}"'
-                                )
-                                message.attach(attachment)
-
-                message['to'] = to
-                message['subject'] = subject
-                if cc:
-                    message['cc'] = cc
-                if bcc:
-                    message['bcc'] = bcc
-
-                raw_message = base64.urlsafe_b64encode(message.as_bytes()).decode('utf-8')
-                sent_message = self.service.users().messages().send(
-                    userId='me',
-                    body={'raw': raw_message}
-                ).execute()
+                            mime_type, _ = mimetypes.guess_type(file_path)
+                            if mime_type:
+                                main_type, sub_type = mime_type.split('/')
+                            else:
+                                main_type, sub_type = 'application', 'octet-stream'
+
+                            attachment = MIMEBase(main_type, sub_type)
+                            attachment.set_payload(self._encode_attachment(file_path))
+                            attachment['Content-Transfer-Encoding'] = 'base64'
+                            attachment.add_header(
+                                'Content-Disposition',
+                                f'attachment; filename="{os.path.basename(file_path)}"'
+                            )
+                            message.attach(attachment)
+
+                    message['to'] = to
+                    message['subject'] = subject
+                    if cc:
+                        message['cc'] = cc
+                    if bcc:
+                        message['bcc'] = bcc
+
+                    # Upload the MIME message as-is instead of base64-wrapping it
+                    # into a JSON body; large messages are spooled to disk
+                    with tempfile.SpooledTemporaryFile(max_size=UPLOAD_CHUNK_SIZE) as spool:
+                        BytesGenerator(spool).flatten(message)
+                        spool.seek(0)
+                        sent_message = await self._execute(self.service.users().messages().send(
+                            userId='me',
+                            media_body=MediaIoBaseUpload(
+                                spool,
+                                mimetype='message/rfc822',
+                                chunksize=UPLOAD_CHUNK_SIZE,
+                                resumable=True
+                            )
+                        ), idempotent=False)
+                else:
+                    raw_bytes = self._build_raw(to, subject, body, html=html, cc=cc, bcc=bcc)
+                    if raw_bytes is None:
+                        raw_bytes = self._build_mime(to, subject, body, html=html, cc=cc, bcc=bcc)
+                    raw_message = _urlsafe_b64encode(raw_bytes)
+                    sent_message = await self._execute(self.service.users().messages().send(
+                        userId='me',
+                        body={'raw': raw_message}
+                    ), idempotent=False)
 
                 return {
                     'success': True,
@@ -223,19 +472,15 @@ class GmailMCPServer:
                 Dict with draft ID and message ID
             """
             try:
-                message = MIMEText(body, 'html' if html else 'plain')
-                message['to'] = to
-                message['subject'] = subject
-                if cc:
-                    message['cc'] = cc
-                if bcc:
-                    message['bcc'] = bcc
-
-                raw_message = base64.urlsafe_b64encode(message.as_bytes()).decode('utf-8')
-                draft = self.service.users().drafts().create(
+                raw_bytes = self._build_raw(to, subject, body, html=html, cc=cc, bcc=bcc)
+                if raw_bytes is None:
+                    raw_bytes = self._build_mime(to, subject, body, html=html, cc=cc, bcc=bcc)
+
+                raw_message = _urlsafe_b64encode(raw_bytes)
+                draft = await self._execute(self.service.users().drafts().create(
                     userId='me',
                     body={'message': {'raw': raw_message}}
-                ).execute()
+                ), idempotent=False)
 
                 return {
                     'success': True,
@@ -263,36 +508,61 @@ class GmailMCPServer:
                 Dict with list of matching emails
             """
             try:
-                results = self.service.users().messages().list(
+                results = await self._execute(self.service.users().messages().list(
                     userId='me',
                     q=query,
                     maxResults=max_results,
                     includeSpamTrash=include_spam_trash
-                ).execute()
+                ))
+
+                message_ids = [msg['id'] for msg in results.get('messages', [])]
+                cached = self._load_cached_emails(message_ids)
+
+                # Message content never changes, so cached messages only need
+                # their (mutable) labels refreshed; the rest get full metadata
+                messages_api = self.service.users().messages()
+                requests = {}
+                for message_id in message_ids:
+                    if message_id in cached:
+                        requests[message_id] = messages_api.get(
+                            userId='me',
+                            id=message_id,
+                            format='minimal',
+                            fields='id,labelIds'
+                        )
+                    else:
+                        requests[message_id] = messages_api.get(
+                            userId='me',
+                            id=message_id,
+                            format='metadata',
+                            metadataHeaders=METADATA_HEADERS,
+                            fields=SEARCH_MESSAGE_FIELDS
+                        )
+                responses = await self._batch_execute(requests)
 
-                messages = results.get('messages', [])
                 email_list = []
-
-                for msg in messages:
-                    msg_data = self.service.users().messages().get(
-                        userId='me',
-                        id=msg['id'],
-                        format='metadata',
-                        metadataHeaders=['From', 'To', 'Subject', 'Date']
-                    ).execute()
-
-                    headers = {h['name']: h['value'] for h in msg_data['payload'].get('headers', [])}
-
-                    email_list.append({
-                        'id': msg['id'],
-                        'threadId': msg_data['threadId'],
-                        'from': headers.get('From', ''),
-                        'to': headers.get('To', ''),
-                        'subject': headers.get('Subject', ''),
-                        'date': headers.get('Date', ''),
-                        'snippet': msg_data.get('snippet', ''),
-                        'labelIds': msg_data.get('labelIds', [])
-                    })
+                fetched = []
+                for message_id in message_ids:
+                    msg_data = responses[message_id]
+                    email = cached.get(message_id)
+
+                    if email is None:
+                        headers = self._flatten_headers(msg_data['payload'])
+                        email = {
+                            'id': message_id,
+                            'threadId': msg_data['threadId'],
+                            'from': headers.get('From', ''),
+                            'to': headers.get('To', ''),
+                            'subject': headers.get('Subject', ''),
+                            'date': headers.get('Date', ''),
+                            'snippet': msg_data.get('snippet', '')
+                        }
+                        fetched.append((email, int(msg_data.get('internalDate', 0))))
+
+                    email['labelIds'] = msg_data.get('labelIds', [])
+                    email_list.append(email)
+
+                self._store_cached_emails(fetched)
 
                 return {
                     'success': True,
@@ -318,11 +588,7 @@ class GmailMCPServer:
                 Dict with email content and metadata
             """
             try:
-                message = self.service.users().messages().get(
-                    userId='me',
-                    id=message_id,
-                    format=format
-                ).execute()
+                message = await self._queued_get(message_id, format)
 
                 # Extract body content if format is 'full'
                 body_content = ''
@@ -330,9 +596,7 @@ class GmailMCPServer:
                     body_content = self._extract_body(message['payload'])
 
                 # Extract headers
-                headers = {}
-                if 'payload' in message and 'headers' in message['payload']:
-                    headers = {h['name']: h['value'] for h in message['payload']['headers']}
+                headers = self._flatten_headers(message.get('payload', {}))
 
                 return {
                     'success': True,
@@ -362,16 +626,16 @@ class GmailMCPServer:
                 Dict with all messages in the thread
             """
             try:
-                thread = self.service.users().threads().get(
+                thread = await self._execute(self.service.users().threads().get(
                     userId='me',
                     id=thread_id
-                ).execute()
+                ))
 
                 messages = []
                 for msg in thread.get('messages', []):
-                    headers = {h['name']: h['value']
-                              for h in msg['payload'].get('headers', [])}
-                    body = self._extract_body(msg['payload'])
+                    payload = msg['payload']
+                    # Full messages carry dozens of headers; keep only the ones returned
+                    headers = self._flatten_headers(payload, SUMMARY_HEADERS)
 
                     messages.append({
                         'id': msg['id'],
@@ -379,7 +643,7 @@ class GmailMCPServer:
                         'to': headers.get('To', ''),
                         'subject': headers.get('Subject', ''),
                         'date': headers.get('Date', ''),
-                        'body': body,
+                        'body': self._extract_body(payload),
                         'snippet': msg.get('snippet', '')
                     })
 
@@ -411,28 +675,31 @@ class GmailMCPServer:
             """
             try:
                 # Get original message
-                original = self.service.users().messages().get(
+                original = await self._execute(self.service.users().messages().get(
                     userId='me',
                     id=message_id,
                     format='metadata',
-                    metadataHeaders=['From', 'To', 'Subject', 'Message-ID']
-                ).execute()
+                    metadataHeaders=REPLY_HEADERS
+                ))
 
-                headers = {h['name']: h['value']
-                          for h in original['payload'].get('headers', [])}
+                headers = self._flatten_headers(original['payload'])
 
                 # Create reply
-                message = MIMEText(body, 'html' if html else 'plain')
-                message['to'] = headers.get('From', '')
-                message['subject'] = f"Re: {headers.get('Subject', '').replace('Re: ', '')}"
-                message['In-Reply-To'] = headers.get('Message-ID', '')
-                message['References'] = headers.get('Message-ID', '')
-
-                raw_message = base64.urlsafe_b64encode(message.as_bytes()).decode('utf-8')
-                sent_message = self.service.users().messages().send(
+                to = headers.get('From', '')
+                subject = f"Re: {REPLY_PREFIX.sub('', headers.get('Subject', ''))}"
+                reply_headers = (
+                    ('In-Reply-To', headers.get('Message-ID', '')),
+                    ('References', headers.get('Message-ID', ''))
+                )
+                raw_bytes = self._build_raw(to, subject, body, html=html, extra_headers=reply_headers)
+                if raw_bytes is None:
+                    raw_bytes = self._build_mime(to, subject, body, html=html, extra_headers=reply_headers)
+
+                raw_message = _urlsafe_b64encode(raw_bytes)
+                sent_message = await self._execute(self.service.users().messages().send(
                     userId='me',
                     body={'raw': raw_message, 'threadId': original['threadId']}
-                ).execute()
+                ), idempotent=False)
 
                 return {
                     'success': True,
@@ -443,7 +710,7 @@ class GmailMCPServer:
                 return {'success': False, 'error': str(e)}
 
         @self.mcp.tool()
-        async def list_labels(self) -> Dict[str, Any]:
+        async def list_labels() -> Dict[str, Any]:
             """
             List all Gmail labels
 
@@ -451,7 +718,15 @@ class GmailMCPServer:
                 Dict with list of labels
             """
             try:
-                results = self.service.users().labels().list(userId='me').execute()
+                # Callers get their own copy, so none can alter the cached result
+                if self._labels_cache and time.monotonic() < self._labels_cache[0]:
+                    cached = self._labels_cache[1]
+                    return {**cached, 'labels': [dict(label) for label in cached['labels']]}
+
+                results = await self._execute(self.service.users().labels().list(
+                    userId='me',
+                    fields=LABEL_FIELDS
+                ))
                 labels = results.get('labels', [])
 
                 label_list = []
@@ -464,11 +739,13 @@ class GmailMCPServer:
                         'labelListVisibility': label.get('labelListVisibility', '')
                     })
 
-                return {
+                result = {
                     'success': True,
                     'count': len(label_list),
                     'labels': label_list
                 }
+                self._labels_cache = (time.monotonic() + LABEL_CACHE_TTL, result)
+                return {**result, 'labels': [dict(label) for label in label_list]}
             except Exception as e:
                 return {'success': False, 'error': str(e)}
 
@@ -490,14 +767,15 @@ class GmailMCPServer:
                 Dict with created label details
             """
             try:
-                label = self.service.users().labels().create(
+                label = await self._execute(self.service.users().labels().create(
                     userId='me',
                     body={
                         'name': name,
                         'messageListVisibility': message_list_visibility,
                         'labelListVisibility': label_list_visibility
                     }
-                ).execute()
+                ), idempotent=False)
+                self._labels_cache = None
 
                 return {
                     'success': True,
@@ -531,11 +809,11 @@ class GmailMCPServer:
                 if remove_labels:
                     body['removeLabelIds'] = remove_labels
 
-                message = self.service.users().messages().modify(
+                message = await self._execute(self.service.users().messages().modify(
                     userId='me',
                     id=message_id,
                     body=body
-                ).execute()
+                ))
 
                 return {
                     'success': True,
@@ -559,10 +837,10 @@ class GmailMCPServer:
                 Dict with deletion status
             """
             try:
-                self.service.users().messages().delete(
+                await self._execute(self.service.users().messages().delete(
                     userId='me',
                     id=message_id
-                ).execute()
+                ))
 
                 return {
                     'success': True,
@@ -585,10 +863,10 @@ class GmailMCPServer:
                 Dict with trash status
             """
             try:
-                message = self.service.users().messages().trash(
+                message = await self._execute(self.service.users().messages().trash(
                     userId='me',
                     id=message_id
-                ).execute()
+                ))
 
                 return {
                     'success': True,
@@ -616,16 +894,19 @@ class GmailMCPServer:
                 Dict with batch operation status
             """
             try:
-                body = {'ids': message_ids}
+                body = {}
                 if add_labels:
                     body['addLabelIds'] = add_labels
                 if remove_labels:
                     body['removeLabelIds'] = remove_labels
 
-                self.service.users().messages().batchModify(
-                    userId='me',
-                    body=body
-                ).execute()
+                # One call per BATCH_MODIFY_LIMIT messages rather than one per message
+                for start in range(0, len(message_ids), BATCH_MODIFY_LIMIT):
+                    body['ids'] = message_ids[start:start + BATCH_MODIFY_LIMIT]
+                    await self._execute(self.service.users().messages().batchModify(
+                        userId='me',
+                        body=body
+                    ))
 
                 return {
                     'success': True,
@@ -683,10 +964,10 @@ class GmailMCPServer:
                 if forward_to:
                     action['forward'] = forward_to
 
-                filter_obj = self.service.users().settings().filters().create(
+                filter_obj = await self._execute(self.service.users().settings().filters().create(
                     userId='me',
                     body={'criteria': criteria, 'action': action}
-                ).execute()
+                ), idempotent=False)
 
                 return {
                     'success': True,
@@ -715,27 +996,24 @@ class GmailMCPServer:
                 Dict with download status
             """
             try:
-                attachment = self.service.users().messages().attachments().get(
+                attachment = await self._execute(self.service.users().messages().attachments().get(
                     userId='me',
                     messageId=message_id,
                     id=attachment_id
-                ).execute()
+                ))
 
-                file_data = base64.urlsafe_b64decode(attachment['data'])
-
-                with open(save_path, 'wb') as f:
-                    f.write(file_data)
+                size = await self._run(self._save_attachment, save_path, attachment['data'])
 
                 return {
                     'success': True,
                     'message': f'Attachment saved to {save_path}',
-                    'size': len(file_data)
+                    'size': size
                 }
             except Exception as e:
                 return {'success': False, 'error': str(e)}
 
         @self.mcp.tool()
-        async def get_profile(self) -> Dict[str, Any]:
+        async def get_profile() -> Dict[str, Any]:
             """
             Get Gmail profile information
 
@@ -743,35 +1021,431 @@ class GmailMCPServer:
                 Dict with profile details
             """
             try:
-                profile = self.service.users().getProfile(userId='me').execute()
+                # Callers get their own copy, so none can alter the cached result
+                if self._profile_cache and time.monotonic() < self._profile_cache[0]:
+                    return dict(self._profile_cache[1])
 
-                return {
+                profile = await self._execute(self.service.users().getProfile(
+                    userId='me',
+                    fields=PROFILE_FIELDS
+                ))
+
+                result = {
                     'success': True,
                     'emailAddress': profile['emailAddress'],
                     'messagesTotal': profile.get('messagesTotal', 0),
                     'threadsTotal': profile.get('threadsTotal', 0),
                     'historyId': profile.get('historyId', '')
                 }
+                self._profile_cache = (time.monotonic() + PROFILE_CACHE_TTL, result)
+                return dict(result)
             except Exception as e:
                 return {'success': False, 'error': str(e)}
 
-    def _extract_body(self, payload):
-        """Extract body from email payload"""
-        body = ''
-
-        if 'parts' in payload:
-            for part in payload['parts']:
-                if part['mimeType'] == 'text/plain':
-                    data = part['body']['data']
-                    body = base64.urlsafe_b64decode(data).decode('utf-8')
+    def _gmail_executor(self):
+        """Return the thread pool for blocking Gmail I/O, creating it on first use"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=GMAIL_WORKERS, thread_name_prefix='gmail')
+        return self._executor
+
+    @contextmanager
+    def _pooled_http(self):
+        """Borrow an authorized transport for use on a worker thread
+
+        httplib2 connections are not thread-safe, so concurrent requests each
+        need a transport of their own. Transports go back into a pool after
+        use, which keeps their connections alive for the next request.
+        """
+        try:
+            http = self._http_pool.get_nowait()
+        except queue.Empty:
+            http = _authorized_http(self.http.credentials)
+        try:
+            yield http
+        finally:
+            self._http_pool.put(http)
+
+    async def _run(self, fn, *args):
+        """Run a blocking call on the Gmail thread pool and await its result"""
+        return await asyncio.get_running_loop().run_in_executor(self._gmail_executor(), fn, *args)
+
+    def _execute_pooled(self, request):
+        """Execute an API request on a pooled transport (worker threads only)"""
+        with self._pooled_http() as http:
+            return request.execute(http=http)
+
+    async def _execute(self, request, idempotent=True):
+        """Execute an API request off the event loop, retrying rate-limited
+        and transient failures
+
+        Pass idempotent=False for requests that must not run twice; those
+        are only retried when rate limited.
+        """
+        retry_statuses = RETRY_STATUSES if idempotent else RATE_LIMIT_STATUSES
+        for attempt in range(NUM_RETRIES + 1):
+            try:
+                return await self._run(self._execute_pooled, request)
+            except HttpError as e:
+                if attempt == NUM_RETRIES or e.resp.status not in retry_statuses:
+                    raise
+                retry_after = e.resp.get('retry-after', '')
+                if retry_after.isdigit():
+                    delay = int(retry_after)
+                else:
+                    delay = RETRY_BASE_DELAY * 2 ** attempt * random.uniform(0.5, 1.5)
+                await asyncio.sleep(min(delay, RETRY_MAX_DELAY))
+
+    async def _queued_get(self, message_id, format):
+        """Fetch a message, batched together with concurrent fetches
+
+        Requests are collected for up to GET_BATCH_WINDOW seconds (or
+        BATCH_SIZE distinct messages) and sent as one batch request; callers
+        asking for the same message in the same window share one fetch.
+        """
+        loop = asyncio.get_running_loop()
+        if self._get_batcher is None or self._get_batcher.get_loop() is not loop:
+            self._get_queue = asyncio.Queue()
+            self._get_batcher = loop.create_task(self._batch_gets(self._get_queue))
+
+        future = loop.create_future()
+        self._get_queue.put_nowait(((message_id, format), future))
+        return await future
+
+    async def _batch_gets(self, queue):
+        """Background task draining _queued_get requests into batches"""
+        loop = asyncio.get_running_loop()
+        while True:
+            key, future = await queue.get()
+            waiting = {key: [future]}
+            deadline = loop.time() + GET_BATCH_WINDOW
+            while len(waiting) < BATCH_SIZE:
+                try:
+                    key, future = await asyncio.wait_for(queue.get(), deadline - loop.time())
+                except asyncio.TimeoutError:
                     break
-                elif part['mimeType'] == 'text/html':
-                    data = part['body']['data']
-                    body = base64.urlsafe_b64decode(data).decode('utf-8')
-        elif payload['body'].get('data'):
-            body = base64.urlsafe_b64decode(payload['body']['data']).decode('utf-8')
+                waiting.setdefault(key, []).append(future)
 
-        return body
+            # Fetch in the background and go straight back to collecting, so
+            # reads arriving meanwhile are not held up behind this batch
+            fetch = loop.create_task(self._fetch_queued(waiting))
+            self._get_fetches.add(fetch)
+            fetch.add_done_callback(self._get_fetches.discard)
+
+    async def _fetch_queued(self, waiting):
+        """Fetch one window of queued messages and resolve their callers' futures"""
+        try:
+            outcomes = await self._fetch_window(list(waiting))
+        except Exception as e:
+            outcomes = [e] * len(waiting)
+
+        for futures, outcome in zip(waiting.values(), outcomes):
+            for future in futures:
+                if future.done():
+                    continue  # caller gave up waiting
+                if isinstance(outcome, BaseException):
+                    future.set_exception(outcome)
+                else:
+                    future.set_result(outcome)
+
+    async def _fetch_window(self, keys):
+        """Fetch the given (message_id, format) pairs, batched where possible
+
+        Returns the response, or the exception raised, for each pair in order.
+        """
+        messages_api = self.service.users().messages()
+        requests = {
+            f'{format}:{message_id}': messages_api.get(userId='me', id=message_id, format=format)
+            for message_id, format in keys
+        }
+        outcomes = {}
+
+        if len(requests) > 1:
+            def collect(request_id, response, exception):
+                outcomes[request_id] = response if exception is None else exception
+
+            def run_batch():
+                batch = self.service.new_batch_http_request(callback=collect)
+                for request_id, request in requests.items():
+                    batch.add(request, request_id=request_id)
+                with self._pooled_http() as http:
+                    batch.execute(http=http)
+
+            try:
+                await self._run(run_batch)
+            except Exception as e:
+                print(f"Batch request failed, sending requests individually: {e}", file=sys.stderr)
+
+        # Send a lone request, anything the batch never answered, and anything
+        # that failed in a way worth retrying on its own; other errors (such
+        # as a message that does not exist) go straight to their callers
+        retry_ids = []
+        for request_id in requests:
+            outcome = outcomes.get(request_id)
+            if isinstance(outcome, HttpError) and outcome.resp.status not in RETRY_STATUSES:
+                continue
+            if request_id not in outcomes or isinstance(outcome, Exception):
+                retry_ids.append(request_id)
+        retried = await asyncio.gather(
+            *(self._execute(requests[request_id]) for request_id in retry_ids),
+            return_exceptions=True
+        )
+        outcomes.update(zip(retry_ids, retried))
+        return [outcomes[request_id] for request_id in requests]
+
+    async def _batch_execute(self, requests):
+        """Execute several API requests in as few HTTP round trips as possible
+
+        requests maps a caller-chosen ID to an unexecuted request. They are
+        sent through the Gmail batch endpoint, up to BATCH_SIZE at a time,
+        with up to MAX_CONCURRENT_BATCHES batches in flight. Any request the
+        batch could not complete is retried individually with backoff.
+        Returns a dict mapping each ID to its response.
+        """
+        results = {}
+
+        def collect(request_id, response, exception):
+            if exception is None:
+                results[request_id] = response
+
+        def run_batch(request_ids):
+            batch = self.service.new_batch_http_request(callback=collect)
+            for request_id in request_ids:
+                batch.add(requests[request_id], request_id=request_id)
+            with self._pooled_http() as http:
+                batch.execute(http=http)
+
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_BATCHES)
+
+        async def run_chunk(request_ids):
+            async with semaphore:
+                await self._run(run_batch, request_ids)
+
+        request_ids = list(requests)
+        outcomes = await asyncio.gather(
+            *(run_chunk(request_ids[start:start + BATCH_SIZE])
+              for start in range(0, len(request_ids), BATCH_SIZE)),
+            return_exceptions=True
+        )
+        for outcome in outcomes:
+            if isinstance(outcome, Exception):
+                print(f"Batch request failed, sending requests individually: {outcome}", file=sys.stderr)
+
+        for request_id in request_ids:
+            if request_id not in results:
+                results[request_id] = await self._execute(requests[request_id])
+
+        return results
+
+    def _cache_db(self):
+        """Open (once) the local message metadata cache"""
+        if self._cache is None:
+            db = sqlite3.connect(CACHE_PATH, check_same_thread=False)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            db.execute(
+                'CREATE TABLE IF NOT EXISTS messages ('
+                'id TEXT PRIMARY KEY, thread_id TEXT, sender TEXT, recipient TEXT, '
+                'subject TEXT, date TEXT, snippet TEXT, internal_date INTEGER)'
+            )
+            self._cache = db
+        return self._cache
+
+    def _load_cached_emails(self, message_ids):
+        """Return {message_id: email dict} for the cached subset of message_ids"""
+        if not message_ids:
+            return {}
+        try:
+            placeholders = ','.join('?' * len(message_ids))
+            rows = self._cache_db().execute(
+                'SELECT id, thread_id, sender, recipient, subject, date, snippet '
+                f'FROM messages WHERE id IN ({placeholders})',
+                message_ids
+            ).fetchall()
+        except sqlite3.Error as e:
+            print(f"Message cache unavailable: {e}", file=sys.stderr)
+            return {}
+
+        return {
+            row[0]: {
+                'id': row[0],
+                'threadId': row[1],
+                'from': row[2],
+                'to': row[3],
+                'subject': row[4],
+                'date': row[5],
+                'snippet': row[6]
+            }
+            for row in rows
+        }
+
+    def _store_cached_emails(self, entries):
+        """Add (email dict, internal_date) pairs to the message cache"""
+        if not entries:
+            return
+        try:
+            db = self._cache_db()
+            with db:
+                db.executemany(
+                    'INSERT OR REPLACE INTO messages VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                    [
+                        (email['id'], email['threadId'], email['from'], email['to'],
+                         email['subject'], email['date'], email['snippet'], internal_date)
+                        for email, internal_date in entries
+                    ]
+                )
+        except sqlite3.Error as e:
+            print(f"Could not update message cache: {e}", file=sys.stderr)
+
+    def _build_raw(self, to, subject, body, html=False, cc=None, bcc=None, extra_headers=()):
+        """Assemble a single-part message directly as RFC 5322 bytes
+
+        Skips the email package's MIME objects and generator. A non-ASCII
+        subject is RFC 2047 encoded; the body is sent as 8-bit UTF-8.
+        Returns None when a header contains line breaks, an address header
+        contains non-ASCII text, or a body line exceeds SMTP's 998-octet
+        limit; callers then fall back to _build_mime.
+        """
+        lines = []
+        for name, value in (('To', to), ('Cc', cc), ('Bcc', bcc), ('Subject', subject), *extra_headers):
+            if not value:
+                continue
+            if '\r' in value or '\n' in value:
+                return None
+            if not value.isascii():
+                if name != 'Subject':
+                    return None
+                value = Header(value, 'utf-8').encode(linesep='\r\n')
+            lines.append(f'{name}: {value}')
+
+        payload = body.encode('utf-8')
+        if len(payload) > 998 and max(map(len, payload.splitlines())) > 998:
+            return None
+
+        lines += [
+            'MIME-Version: 1.0',
+            f'Content-Type: text/{"html" if html else "plain"}; charset="utf-8"',
+            'Content-Transfer-Encoding: 8bit',
+            '',
+            ''
+        ]
+        return '\r\n'.join(lines).encode('ascii') + payload
+
+    def _build_mime(self, to, subject, body, html=False, cc=None, bcc=None, extra_headers=()):
+        """Build a single-part message with the email package
+
+        Handles what _build_raw won't: non-ASCII display names are encoded,
+        header values with line breaks are rejected, and bodies with overlong
+        lines get a suitable transfer encoding. The SMTP policy keeps other
+        bodies as 8-bit text instead of re-encoding them.
+        """
+        message = EmailMessage(policy=SMTP)
+        for name, value in (('To', to), ('Cc', cc), ('Bcc', bcc), ('Subject', subject), *extra_headers):
+            if value:
+                message[name] = value
+        message.set_content(body, subtype='html' if html else 'plain', charset='utf-8')
+        return message.as_bytes()
+
+    def _encode_attachment(self, file_path):
+        """Base64-encode a file as MIME body text, 76 characters per line
+
+        The file is memory-mapped and encoded a slice at a time straight into
+        an output buffer sized up front, so the raw file is never copied into
+        memory and the encoded text is never reallocated while it grows.
+        """
+        encodebytes = pybase64.encodebytes if pybase64 else base64.encodebytes
+
+        with open(file_path, 'rb') as f:
+            if not os.fstat(f.fileno()).st_size:
+                return ''  # empty files can't be mapped
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                size = len(mapped)
+                full_lines, tail = divmod(size, 57)
+                encoded = bytearray(full_lines * 77 + ((tail + 2) // 3 * 4 + 1 if tail else 0))
+
+                view = memoryview(mapped)
+                try:
+                    pos = 0
+                    for start in range(0, size, ATTACHMENT_CHUNK_SIZE):
+                        line = encodebytes(view[start:start + ATTACHMENT_CHUNK_SIZE])
+                        encoded[pos:pos + len(line)] = line
+                        pos += len(line)
+                finally:
+                    view.release()
+
+        return encoded.decode('ascii')
+
+    def _save_attachment(self, save_path, data):
+        """Decode attachment data from Gmail and write it to save_path
+
+        The file is preallocated where the platform supports it and written
+        straight from the decoded buffer. Returns the number of bytes saved.
+        """
+        file_data = _urlsafe_b64decode(data)
+        fd = os.open(save_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0), 0o644)
+        try:
+            if file_data and hasattr(os, 'posix_fallocate'):
+                try:
+                    os.posix_fallocate(fd, 0, len(file_data))
+                except OSError:
+                    pass  # not supported by this filesystem
+            view = memoryview(file_data)
+            while view:
+                view = view[os.write(fd, view):]
+        finally:
+            os.close(fd)
+        return len(file_data)
+
+    def _flatten_headers(self, payload, keep=None):
+        """Map header names to values for a message payload
+
+        If keep is given, only headers whose names are in it are included.
+        """
+        headers = payload.get('headers', [])
+        if keep is None:
+            return {h['name']: h['value'] for h in headers}
+        return {h['name']: h['value'] for h in headers if h['name'] in keep}
+
+    def _extract_body(self, payload):
+        """Extract body from email payload, preferring text/plain over text/html
+
+        Nested multipart parts are walked depth-first with an explicit stack,
+        and only the part that is returned gets decoded. Invalid UTF-8 is
+        replaced rather than failing the whole message.
+        """
+        html_data = None
+        stack = [payload]
+
+        while stack:
+            part = stack.pop()
+            if part.get('parts'):
+                # Reversed so parts are visited in message order
+                stack.extend(reversed(part['parts']))
+                continue
+
+            data = part.get('body', {}).get('data')
+            if not data:
+                continue
+            mime_type = part.get('mimeType')
+            if part is payload or mime_type == 'text/plain':
+                return _urlsafe_b64decode(data).decode('utf-8', 'replace')
+            if mime_type == 'text/html' and html_data is None:
+                html_data = data
+
+        return _urlsafe_b64decode(html_data).decode('utf-8', 'replace') if html_data else ''
+
+    def _report_profile(self):
+        """Print the connected account's profile to stderr"""
+        try:
+            with self._pooled_http() as http:
+                profile = self.service.users().getProfile(
+                    userId='me',
+                    fields=PROFILE_FIELDS
+                ).execute(http=http)
+            print(f"Connected to: {profile.get('emailAddress')}", file=sys.stderr)
+            print(f"Total messages: {profile.get('messagesTotal')}", file=sys.stderr)
+            print(f"Total threads: {profile.get('threadsTotal')}", file=sys.stderr)
+        except Exception as e:
+            print(f"Could not fetch profile: {e}", file=sys.stderr)
 
     def run(self):
         """Run the MCP server"""
@@ -782,15 +1456,11 @@ class GmailMCPServer:
             manual_auth = getattr(self, '_manual_auth', False)
             self.authenticate(manual_auth=manual_auth)
             print("Authentication successful!", file=sys.stderr)
+            self._start_token_refresher()
 
-            # Get profile to verify connection
-            try:
-                profile = self.service.users().getProfile(userId='me').execute()
-                print(f"Connected to: {profile.get('emailAddress')}", file=sys.stderr)
-                print(f"Total messages: {profile.get('messagesTotal')}", file=sys.stderr)
-                print(f"Total threads: {profile.get('threadsTotal')}", file=sys.stderr)
-            except Exception as e:
-                print(f"Could not fetch profile: {e}", file=sys.stderr)
+            # Verify the connection in the background so the server can start
+            # answering MCP requests without waiting on a Gmail round trip
+            threading.Thread(target=self._report_profile, name='gmail-profile-check', daemon=True).start()
 
             print("\nGmail MCP Server (Secondary) is ready!", file=sys.stderr)
             print("Available tools: send_email, search_emails, read_email, create_draft, and more...", file=sys.stderr)
@@ -803,8 +1473,10 @@ class GmailMCPServer:
             print(f"Error starting server: {e}", file=sys.stderr)
             raise
 
-def main():
-    """Main entry point"""
+def _parse_args():
+    """Parse command line flags"""
+    import argparse
+
     parser = argparse.ArgumentParser(description="Gmail MCP Server (Secondary)")
     parser.add_argument(
         "--manual-auth",
@@ -816,16 +1488,29 @@ def main():
         action="store_true",
         help="Test authentication and exit"
     )
-    args = parser.parse_args()
+    return parser.parse_args()
+
+def main():
+    """Main entry point"""
+    # MCP clients start the server without flags, so only load argparse
+    # when there is something to parse
+    if len(sys.argv) > 1:
+        args = _parse_args()
+        manual_auth, test_auth = args.manual_auth, args.test_auth
+    else:
+        manual_auth = test_auth = False
 
     server = GmailMCPServer()
 
-    if args.test_auth:
+    if test_auth:
         print("Testing Gmail authentication (Secondary)...", file=sys.stderr)
         try:
-            server.authenticate(manual_auth=args.manual_auth)
+            server.authenticate(manual_auth=manual_auth)
             # Get profile directly from service
-            profile = server.service.users().getProfile(userId='me').execute()
+            profile = server.service.users().getProfile(
+                userId='me',
+                fields=PROFILE_FIELDS
+            ).execute()
             print(f"[OK] Authentication successful!", file=sys.stderr)
             print(f"[OK] Connected to: {profile['emailAddress']}", file=sys.stderr)
             print(f"[OK] Total messages: {profile.get('messagesTotal', 0)}", file=sys.stderr)
@@ -834,10 +1519,15 @@ def main():
         except Exception as e:
             print(f"[ERROR] Authentication failed: {e}", file=sys.stderr)
             sys.exit(1)
+        finally:
+            server.close()
     else:
         # Set manual auth flag for the server
-        server._manual_auth = args.manual_auth
-        server.run()
+        server._manual_auth = manual_auth
+        try:
+            server.run()
+        finally:
+            server.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
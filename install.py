@@ -5,15 +5,20 @@ Assists with initial setup and configuration
 """
 
 import os
+import re
 import sys
 import subprocess
 import json
+from importlib import metadata
 from pathlib import Path
 
 
 class GmailMCPInstaller:
     """Installation helper for Gmail MCP Server"""
 
+    # How many times to walk the user through OAuth setup before giving up
+    MAX_CREDENTIAL_ATTEMPTS = 3
+
     def __init__(self):
         self.project_dir = Path(__file__).parent
         self.requirements_file = self.project_dir / "requirements.txt"
@@ -37,6 +42,36 @@ class GmailMCPInstaller:
         print(f"✓ Python {version.major}.{version.minor}.{version.micro}")
         return True
 
+    def missing_requirements(self):
+        """List requirements that are not installed at a satisfying version"""
+        missing = []
+        for line in self.requirements_file.read_text().splitlines():
+            line = line.split('#', 1)[0].strip()
+            if not line:
+                continue
+            match = re.match(r'([A-Za-z0-9_.\-]+)\s*(?:(>=|==)\s*([\w.]+))?', line)
+            if not match:
+                missing.append(line)
+                continue
+            name, op, wanted = match.groups()
+            try:
+                installed = metadata.version(name)
+            except metadata.PackageNotFoundError:
+                missing.append(line)
+                continue
+            if op and not self._version_ok(installed, op, wanted):
+                missing.append(line)
+        return missing
+
+    @staticmethod
+    def _version_ok(installed, op, wanted):
+        """Compare dotted release numbers, ignoring pre/post-release tags"""
+        def release(version):
+            return tuple(int(part) for part in re.findall(r'\d+', version.split('+')[0])[:3])
+        if op == '==':
+            return release(installed) == release(wanted)
+        return release(installed) >= release(wanted)
+
     def install_dependencies(self):
         """Install required packages"""
         print("\n📦 Installing dependencies...")
@@ -45,9 +80,14 @@ class GmailMCPInstaller:
             print("✗ requirements.txt not found")
             return False
 
+        if not self.missing_requirements():
+            print("✓ Dependencies already installed")
+            return True
+
         try:
             subprocess.check_call([
-                sys.executable, "-m", "pip", "install", "-r", str(self.requirements_file)
+                sys.executable, "-m", "pip", "install", "--disable-pip-version-check", "--no-input",
+                "-r", str(self.requirements_file)
             ])
             print("✓ Dependencies installed successfully")
             return True
@@ -104,25 +144,23 @@ class GmailMCPInstaller:
 
         try:
             # Import here to ensure dependencies are installed
-            from gmail_mcp_server import GmailMCPServer
+            from gmail_mcp_server import GmailMCPServer, PROFILE_FIELDS
 
             server = GmailMCPServer()
             server.authenticate()
             print("✓ Authentication successful!")
 
-            # Test basic operations
-            import asyncio
-
-            async def test_basic_ops():
-                profile = await server.get_profile()
-                if profile['success']:
-                    print(f"✓ Connected as: {profile['emailAddress']}")
-                    print(f"✓ Messages: {profile['messagesTotal']}")
-                    return True
-                return False
-
-            result = asyncio.run(test_basic_ops())
-            return result
+            # Test basic operations; one synchronous call needs no event loop
+            try:
+                profile = server.service.users().getProfile(
+                    userId='me',
+                    fields=PROFILE_FIELDS
+                ).execute()
+            finally:
+                server.close()
+            print(f"✓ Connected as: {profile['emailAddress']}")
+            print(f"✓ Messages: {profile.get('messagesTotal', 0)}")
+            return True
 
         except ImportError as e:
             print(f"✗ Import error: {e}")
@@ -177,8 +215,14 @@ class GmailMCPInstaller:
             return False
 
         # Check/guide OAuth setup
+        attempts = 0
         while not self.check_credentials():
+            if attempts == self.MAX_CREDENTIAL_ATTEMPTS:
+                print("\n✗ Still no valid credentials.json, stopping")
+                print(f"Save your OAuth client file as {self.credentials_file} and run the installer again")
+                return False
             self.guide_oauth_setup()
+            attempts += 1
 
         # Test authentication
         if not self.test_authentication():
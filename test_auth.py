@@ -4,11 +4,10 @@ Simple authentication test script for Gmail MCP Server
 This script helps verify that authentication is working correctly
 """
 
-import asyncio
 import sys
-from gmail_mcp_server import GmailMCPServer
+from gmail_mcp_server import GmailMCPServer, LABEL_FIELDS, METADATA_HEADERS, PROFILE_FIELDS
 
-async def test_authentication():
+def test_authentication():
     """Test Gmail authentication and basic functionality"""
     print("=" * 60)
     print("GMAIL MCP SERVER AUTHENTICATION TEST")
@@ -23,41 +22,70 @@ async def test_authentication():
         server.authenticate(manual_auth=True)
         print("✓ Authentication successful!")
 
+        # Profile, inbox search and labels go to Gmail as one batch request
+        results = {}
+
+        def collect(request_id, response, exception):
+            results[request_id] = (response, exception)
+
+        users = server.service.users()
+        batch = server.service.new_batch_http_request(callback=collect)
+        batch.add(users.getProfile(userId='me', fields=PROFILE_FIELDS), request_id='profile')
+        batch.add(users.messages().list(userId='me', q='in:inbox', maxResults=5), request_id='search')
+        batch.add(users.labels().list(userId='me', fields=LABEL_FIELDS), request_id='labels')
+        batch.execute()
+
         print("\n2. Testing Gmail API connection...")
-        profile = await server.get_profile()
-
-        if profile['success']:
-            print("✓ Gmail API connection successful!")
-            print(f"   Email: {profile['emailAddress']}")
-            print(f"   Messages: {profile['messagesTotal']}")
-            print(f"   Threads: {profile['threadsTotal']}")
-        else:
-            print(f"✗ Failed to get profile: {profile.get('error')}")
+        profile, error = results['profile']
+        if error:
+            print(f"✗ Failed to get profile: {error}")
             return False
+        print("✓ Gmail API connection successful!")
+        print(f"   Email: {profile['emailAddress']}")
+        print(f"   Messages: {profile.get('messagesTotal', 0)}")
+        print(f"   Threads: {profile.get('threadsTotal', 0)}")
 
         print("\n3. Testing basic email search...")
-        search_result = await server.search_emails("in:inbox", max_results=5)
-
-        if search_result['success']:
-            print(f"✓ Email search successful! Found {search_result['count']} messages")
-            for i, email in enumerate(search_result['emails'][:3], 1):
-                print(f"   {i}. From: {email['from'][:50]}...")
-                print(f"      Subject: {email['subject'][:50]}...")
-        else:
-            print(f"✗ Email search failed: {search_result.get('error')}")
+        search, error = results['search']
+        if error:
+            print(f"✗ Email search failed: {error}")
             return False
+        messages = search.get('messages', [])
+        print(f"✓ Email search successful! Found {len(messages)} messages")
+
+        # Headers for the first few results, again in a single batch
+        headers = {}
+
+        def collect_headers(request_id, response, exception):
+            if response:
+                headers[int(request_id)] = {
+                    h['name']: h['value'] for h in response.get('payload', {}).get('headers', [])
+                }
+
+        if messages:
+            batch = server.service.new_batch_http_request(callback=collect_headers)
+            for i, message in enumerate(messages[:3], 1):
+                batch.add(users.messages().get(
+                    userId='me',
+                    id=message['id'],
+                    format='metadata',
+                    metadataHeaders=METADATA_HEADERS
+                ), request_id=str(i))
+            batch.execute()
+        for i in sorted(headers):
+            print(f"   {i}. From: {headers[i].get('From', '')[:50]}...")
+            print(f"      Subject: {headers[i].get('Subject', '')[:50]}...")
 
         print("\n4. Testing label listing...")
-        labels_result = await server.list_labels()
-
-        if labels_result['success']:
-            print(f"✓ Label listing successful! Found {labels_result['count']} labels")
-            system_labels = [l for l in labels_result['labels'] if l['type'] == 'system'][:5]
-            for label in system_labels:
-                print(f"   - {label['name']} (ID: {label['id']})")
-        else:
-            print(f"✗ Label listing failed: {labels_result.get('error')}")
+        labels, error = results['labels']
+        if error:
+            print(f"✗ Label listing failed: {error}")
             return False
+        labels = labels.get('labels', [])
+        print(f"✓ Label listing successful! Found {len(labels)} labels")
+        system_labels = [l for l in labels if l['type'] == 'system'][:5]
+        for label in system_labels:
+            print(f"   - {label['name']} (ID: {label['id']})")
 
         print("\n" + "=" * 60)
         print("✓ ALL TESTS PASSED!")
@@ -76,7 +104,7 @@ async def test_authentication():
 
 def main():
     """Main entry point"""
-    success = asyncio.run(test_authentication())
+    success = test_authentication()
     sys.exit(0 if success else 1)
 
 if __name__ == "__main__":
@@ -5,173 +5,274 @@ Tests all available Gmail operations
 """
 
 import asyncio
+import contextvars
+import io
+import os
 import json
 import sys
-from pathlib import Path
 from datetime import datetime
 
 # Add parent directory to path for imports
-sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from gmail_mcp_server import GmailMCPServer
 
+# Tests run concurrently; this caps how many hit the Gmail API at once
+TEST_CONCURRENCY = 5
+
+# Name prefix of the labels test_create_and_delete_label creates
+TEST_LABEL_PREFIX = 'MCP_Test_'
+
+# Output buffer of the test running in the current task, if any
+_test_output = contextvars.ContextVar('test_output', default=None)
+
 
 class GmailMCPTester:
     """Test harness for Gmail MCP Server"""
 
+    # (query, description) pairs checked by test_advanced_search
+    ADVANCED_QUERIES = (
+        ("has:attachment", "Emails with attachments"),
+        ("is:important", "Important emails"),
+        ("in:sent", "Sent emails"),
+        ("label:inbox", "Inbox emails")
+    )
+
     def __init__(self):
         self.server = GmailMCPServer()
         self.test_results = []
+        # Tool functions by name, looked up once by setup()
+        self.tools = None
+        # Shared get_profile call for the current test run
+        self._profile = None
+        # Start time of the current test run, used to name what the tests create
+        self._run_started = datetime.now()
+
+    async def setup(self):
+        """Look up the server's tool functions"""
+        self.tools = await self.server.tool_functions()
+
+    def _log(self, text=""):
+        """Print a line, or buffer it while run_all_tests runs the test
+
+        Buffering keeps each concurrent test's output together; it is
+        written out in one piece when the test finishes.
+        """
+        output = _test_output.get()
+        if output is None:
+            print(text)
+        else:
+            output.write(text)
+            output.write("\n")
 
     async def test_authentication(self):
         """Test Gmail API authentication"""
-        print("\n=== Testing Authentication ===")
+        self._log("\n=== Testing Authentication ===")
         try:
             self.server.authenticate()
-            print("✓ Authentication successful")
+            self._log("✓ Authentication successful")
             return True
         except Exception as e:
-            print(f"✗ Authentication failed: {e}")
+            self._log(f"✗ Authentication failed: {e}")
             return False
 
     async def test_get_profile(self):
         """Test getting Gmail profile"""
-        print("\n=== Testing Get Profile ===")
+        self._log("\n=== Testing Get Profile ===")
         try:
-            result = await self.server.mcp.tools[14]._func()  # get_profile
+            result = await self._get_profile_cached()
             if result['success']:
-                print(f"✓ Email: {result['emailAddress']}")
-                print(f"  Messages: {result['messagesTotal']}")
-                print(f"  Threads: {result['threadsTotal']}")
+                self._log(f"✓ Email: {result['emailAddress']}")
+                self._log(f"  Messages: {result['messagesTotal']}")
+                self._log(f"  Threads: {result['threadsTotal']}")
                 return True
             else:
-                print(f"✗ Failed: {result['error']}")
+                self._log(f"✗ Failed: {result['error']}")
                 return False
         except Exception as e:
-            print(f"✗ Error: {e}")
+            self._log(f"✗ Error: {e}")
             return False
 
     async def test_list_labels(self):
         """Test listing Gmail labels"""
-        print("\n=== Testing List Labels ===")
+        self._log("\n=== Testing List Labels ===")
         try:
-            result = await self.server.mcp.tools[7]._func()  # list_labels
+            result = await self.tools['list_labels']()
             if result['success']:
-                print(f"✓ Found {result['count']} labels")
-                for label in result['labels'][:5]:  # Show first 5
-                    print(f"  - {label['name']} ({label['type']})")
+                self._log(f"✓ Found {result['count']} labels")
+                if result['labels']:
+                    # Show first 5, written as one block
+                    self._log("\n".join(
+                        f"  - {label['name']} ({label['type']})" for label in result['labels'][:5]
+                    ))
                 return True
             else:
-                print(f"✗ Failed: {result['error']}")
+                self._log(f"✗ Failed: {result['error']}")
                 return False
         except Exception as e:
-            print(f"✗ Error: {e}")
+            self._log(f"✗ Error: {e}")
             return False
 
     async def test_search_emails(self):
         """Test searching emails"""
-        print("\n=== Testing Email Search ===")
+        self._log("\n=== Testing Email Search ===")
         try:
             # Search for recent emails
-            result = await self.server.mcp.tools[2]._func(
+            result = await self.tools['search_emails'](
                 query="is:unread",
                 max_results=5
-            )  # search_emails
+            )
 
             if result['success']:
-                print(f"✓ Found {result['count']} unread emails")
-                for email in result['emails']:
-                    print(f"  - From: {email['from'][:50]}...")
-                    print(f"    Subject: {email['subject'][:50]}...")
+                self._log(f"✓ Found {result['count']} unread emails")
+                if result['emails']:
+                    self._log("\n".join(
+                        f"  - From: {email['from']:.50}...\n"
+                        f"    Subject: {email['subject']:.50}..."
+                        for email in result['emails']
+                    ))
                 return True
             else:
-                print(f"✗ Failed: {result['error']}")
+                self._log(f"✗ Failed: {result['error']}")
                 return False
         except Exception as e:
-            print(f"✗ Error: {e}")
+            self._log(f"✗ Error: {e}")
             return False
 
     async def test_create_and_delete_label(self):
         """Test creating and deleting a label"""
-        print("\n=== Testing Create Label ===")
+        self._log("\n=== Testing Create Label ===")
+        label_id = None
         try:
             # Create a test label
-            test_label_name = f"MCP_Test_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-            result = await self.server.mcp.tools[8]._func(
+            test_label_name = f"{TEST_LABEL_PREFIX}{self._run_started.strftime('%Y%m%d_%H%M%S')}"
+            result = await self.tools['create_label'](
                 name=test_label_name
-            )  # create_label
+            )
 
             if result['success']:
-                print(f"✓ Created label: {result['name']}")
-                print(f"  ID: {result['labelId']}")
-
-                # Note: Label deletion would need to be added to the server
-                # For now, we just confirm creation
+                label_id = result['labelId']
+                self._log(f"✓ Created label: {result['name']}")
+                self._log(f"  ID: {label_id}")
                 return True
             else:
-                print(f"✗ Failed: {result['error']}")
+                self._log(f"✗ Failed: {result['error']}")
                 return False
         except Exception as e:
-            print(f"✗ Error: {e}")
+            self._log(f"✗ Error: {e}")
             return False
+        finally:
+            # Delete it again however the test ended, so test labels don't
+            # pile up in the account
+            if label_id:
+                try:
+                    await self.server._execute(self.server.service.users().labels().delete(
+                        userId='me',
+                        id=label_id
+                    ))
+                    self._log("✓ Deleted label")
+                except Exception as e:
+                    self._log(f"⚠ Could not delete label {label_id}: {e}")
+                finally:
+                    self.server._labels_cache = None
 
     async def test_create_draft(self):
         """Test creating a draft email"""
-        print("\n=== Testing Create Draft ===")
+        self._log("\n=== Testing Create Draft ===")
         try:
             # Get profile to get email address
-            profile = await self.server.mcp.tools[14]._func()  # get_profile
+            profile = await self._get_profile_cached()
             if not profile['success']:
-                print("✗ Could not get profile")
+                self._log("✗ Could not get profile")
                 return False
 
-            result = await self.server.mcp.tools[1]._func(
+            result = await self.tools['create_draft'](
                 to=profile['emailAddress'],  # Send to self
-                subject=f"MCP Test Draft - {datetime.now().strftime('%Y-%m-%d %H:%M')}",
+                subject=f"MCP Test Draft - {self._run_started.strftime('%Y-%m-%d %H:%M')}",
                 body="This is a test draft created by Gmail MCP Server.\n\nThis email was created as a draft and not sent.",
                 html=False
-            )  # create_draft
+            )
 
             if result['success']:
-                print(f"✓ Created draft")
-                print(f"  Draft ID: {result['draftId']}")
-                print(f"  Message ID: {result['messageId']}")
+                self._log(f"✓ Created draft")
+                self._log(f"  Draft ID: {result['draftId']}")
+                self._log(f"  Message ID: {result['messageId']}")
                 return True
             else:
-                print(f"✗ Failed: {result['error']}")
+                self._log(f"✗ Failed: {result['error']}")
                 return False
         except Exception as e:
-            print(f"✗ Error: {e}")
+            self._log(f"✗ Error: {e}")
             return False
 
     async def test_advanced_search(self):
         """Test advanced email search"""
-        print("\n=== Testing Advanced Search ===")
-
-        # Test various search queries
-        queries = [
-            ("has:attachment", "Emails with attachments"),
-            ("is:important", "Important emails"),
-            ("in:sent", "Sent emails"),
-            ("label:inbox", "Inbox emails")
-        ]
+        self._log("\n=== Testing Advanced Search ===")
 
-        for query, description in queries:
-            try:
-                result = await self.server.mcp.tools[2]._func(
-                    query=query,
-                    max_results=2
-                )  # search_emails
+        # One batch request for all queries instead of a round trip each
+        try:
+            results = await self._batch_search(self.ADVANCED_QUERIES, max_results=2)
+        except Exception as e:
+            self._log(f"✗ Advanced search failed: {e}")
+            return False
 
-                if result['success']:
-                    print(f"✓ {description}: Found {result['count']} emails")
-                else:
-                    print(f"✗ {description}: {result['error']}")
-            except Exception as e:
-                print(f"✗ {description}: {e}")
+        self._log("\n".join(
+            f"✓ {description}: Found {len(results[query].get('messages', []))} emails"
+            for query, description in self.ADVANCED_QUERIES
+        ))
 
         return True
 
+    async def cleanup_test_labels(self):
+        """Delete the test labels earlier, interrupted runs left behind
+
+        Run on request only: it removes every label named with
+        TEST_LABEL_PREFIX, including one a test run in progress has made.
+        """
+        print("=" * 60)
+        print("Gmail MCP Server - Test Label Cleanup")
+        print("=" * 60)
+
+        if not await self.test_authentication():
+            print("\n✗ Authentication failed.")
+            return
+
+        removed = await self._cleanup_stale_test_labels()
+        print(f"✓ Removed {removed} old test label(s)")
+
+    async def _cleanup_stale_test_labels(self):
+        """Delete test labels from earlier runs in one batch; returns how many"""
+        labels = self.server.service.users().labels()
+        response = await self.server._execute(labels.list(userId='me', fields='labels(id,name)'))
+        stale = [
+            label['id'] for label in response.get('labels', [])
+            if label['name'].startswith(TEST_LABEL_PREFIX)
+        ]
+        if stale:
+            await self.server._batch_execute({
+                label_id: labels.delete(userId='me', id=label_id) for label_id in stale
+            })
+            self.server._labels_cache = None
+        return len(stale)
+
+    async def _get_profile_cached(self):
+        """Get the profile once per run; concurrent tests await the same call"""
+        if self._profile is None:
+            self._profile = asyncio.ensure_future(self.tools['get_profile']())
+        return await self._profile
+
+    async def _batch_search(self, queries, max_results):
+        """List messages for several (query, description) pairs in one batch
+
+        Uses the server's batch helper, which retries any query the batch
+        could not complete on its own. Returns responses keyed by query.
+        """
+        messages = self.server.service.users().messages()
+        return await self.server._batch_execute({
+            query: messages.list(userId='me', q=query, maxResults=max_results)
+            for query, _ in queries
+        })
+
     async def run_all_tests(self):
         """Run all tests"""
         print("=" * 60)
@@ -183,7 +284,9 @@ class GmailMCPTester:
             print("\n✗ Authentication failed. Cannot continue tests.")
             return
 
-        # Run all tests
+        # Run all tests, with a fresh profile lookup for this run
+        self._profile = None
+        self._run_started = datetime.now()
         tests = [
             self.test_get_profile,
             self.test_list_labels,
@@ -196,9 +299,23 @@ class GmailMCPTester:
         passed = 0
         failed = 0
 
-        for test in tests:
+        # The tests don't depend on each other, so their API calls can overlap
+        limit = asyncio.Semaphore(TEST_CONCURRENCY)
+
+        async def run_limited(test):
+            async with limit:
+                output = io.StringIO()
+                _test_output.set(output)
+                try:
+                    return await test()
+                finally:
+                    sys.stdout.write(output.getvalue())
+
+        # Tally each test as soon as it finishes, so a crashed test is
+        # reported right away rather than after the slowest one
+        for finished in asyncio.as_completed([run_limited(test) for test in tests]):
             try:
-                if await test():
+                if await finished:
                     passed += 1
                 else:
                     failed += 1
@@ -219,6 +336,118 @@ class GmailMCPTester:
         else:
             print(f"\n⚠ {failed} test(s) failed")
 
+    async def _ask(self, prompt):
+        """Read a line of input without blocking the event loop"""
+        return (await asyncio.to_thread(input, prompt)).strip()
+
+    async def _interactive_send_email(self):
+        """Send an email built from prompted fields"""
+        to = await self._ask("To (email address): ")
+        subject = await self._ask("Subject: ")
+        body = await self._ask("Body: ")
+
+        result = await self.tools['send_email'](
+            to=to, subject=subject, body=body
+        )
+
+        if result['success']:
+            print(f"✓ Email sent! Message ID: {result['messageId']}")
+        else:
+            print(f"✗ Failed: {result['error']}")
+
+    async def _interactive_search_emails(self):
+        """Search emails with a prompted query"""
+        query = await self._ask("Search query (e.g., 'is:unread', 'from:someone@example.com'): ")
+        max_results = await self._ask("Max results (default 10): ")
+        max_results = int(max_results) if max_results else 10
+
+        result = await self.tools['search_emails'](
+            query=query, max_results=max_results
+        )
+
+        if result['success']:
+            print(f"\n✓ Found {result['count']} emails:")
+            print("".join(
+                f"\n  ID: {email['id']}\n"
+                f"  From: {email['from']}\n"
+                f"  Subject: {email['subject']}\n"
+                f"  Date: {email['date']}\n"
+                f"  Snippet: {email['snippet']:.100}...\n"
+                for email in result['emails']
+            ), end="")
+        else:
+            print(f"✗ Failed: {result['error']}")
+
+    async def _interactive_read_email(self):
+        """Show one email by ID"""
+        message_id = await self._ask("Message ID: ")
+
+        result = await self.tools['read_email'](
+            message_id=message_id
+        )
+
+        if result['success']:
+            print(f"\n✓ Email Details:")
+            print(f"  From: {result['headers'].get('From', 'N/A')}")
+            print(f"  To: {result['headers'].get('To', 'N/A')}")
+            print(f"  Subject: {result['headers'].get('Subject', 'N/A')}")
+            print(f"  Date: {result['headers'].get('Date', 'N/A')}")
+            print(f"\n  Body:\n{result['body']:.500}...")
+        else:
+            print(f"✗ Failed: {result['error']}")
+
+    async def _interactive_create_label(self):
+        """Create a label with a prompted name"""
+        name = await self._ask("Label name: ")
+
+        result = await self.tools['create_label'](name=name)
+
+        if result['success']:
+            print(f"✓ Label created: {result['name']} (ID: {result['labelId']})")
+        else:
+            print(f"✗ Failed: {result['error']}")
+
+    async def _interactive_get_profile(self):
+        """Show current profile info"""
+        # Fresh counts, not the profile cached by the last test run
+        self._profile = None
+        await self.test_get_profile()
+
+    async def _interactive_create_draft(self):
+        """Create a draft built from prompted fields"""
+        to = await self._ask("To (email address): ")
+        subject = await self._ask("Subject: ")
+        body = await self._ask("Body: ")
+
+        result = await self.tools['create_draft'](
+            to=to, subject=subject, body=body
+        )
+
+        if result['success']:
+            print(f"✓ Draft created! Draft ID: {result['draftId']}")
+        else:
+            print(f"✗ Failed: {result['error']}")
+
+    async def _interactive_get_thread(self):
+        """Show the messages in a thread"""
+        thread_id = await self._ask("Thread ID: ")
+
+        result = await self.tools['get_thread'](
+            thread_id=thread_id
+        )
+
+        if result['success']:
+            print(f"\n✓ Thread contains {result['messageCount']} messages:")
+            print("".join(
+                f"\n  Message {i}:\n"
+                f"    From: {msg['from']}\n"
+                f"    Date: {msg['date']}\n"
+                f"    Snippet: {msg['snippet']:.100}...\n"
+                for i, msg in enumerate(result['messages'], 1)
+            ), end="")
+        else:
+            print(f"✗ Failed: {result['error']}")
+
     async def interactive_test(self):
         """Interactive testing mode"""
         print("=" * 60)
@@ -229,6 +458,19 @@ class GmailMCPTester:
             print("\n✗ Authentication failed.")
             return
 
+        # Menu choices other than exit ("0"), mapped to their handlers
+        handlers = {
+            "1": self._interactive_send_email,
+            "2": self._interactive_search_emails,
+            "3": self._interactive_read_email,
+            "4": self.test_list_labels,
+            "5": self._interactive_create_label,
+            "6": self._interactive_get_profile,
+            "7": self._interactive_create_draft,
+            "8": self._interactive_get_thread,
+            "9": self.run_all_tests
+        }
+
         while True:
             print("\n" + "=" * 40)
             print("Available Operations:")
@@ -244,122 +486,15 @@ class GmailMCPTester:
             print("0. Exit")
             print("=" * 40)
 
-            choice = input("\nSelect operation (0-9): ").strip()
+            choice = await self._ask("\nSelect operation (0-9): ")
 
             if choice == "0":
                 print("Exiting...")
                 break
 
-            elif choice == "1":
-                # Send email
-                to = input("To (email address): ").strip()
-                subject = input("Subject: ").strip()
-                body = input("Body: ").strip()
-
-                result = await self.server.mcp.tools[0]._func(
-                    to=to, subject=subject, body=body
-                )
-
-                if result['success']:
-                    print(f"✓ Email sent! Message ID: {result['messageId']}")
-                else:
-                    print(f"✗ Failed: {result['error']}")
-
-            elif choice == "2":
-                # Search emails
-                query = input("Search query (e.g., 'is:unread', 'from:someone@example.com'): ").strip()
-                max_results = input("Max results (default 10): ").strip()
-                max_results = int(max_results) if max_results else 10
-
-                result = await self.server.mcp.tools[2]._func(
-                    query=query, max_results=max_results
-                )
-
-                if result['success']:
-                    print(f"\n✓ Found {result['count']} emails:")
-                    for email in result['emails']:
-                        print(f"\n  ID: {email['id']}")
-                        print(f"  From: {email['from']}")
-                        print(f"  Subject: {email['subject']}")
-                        print(f"  Date: {email['date']}")
-                        print(f"  Snippet: {email['snippet'][:100]}...")
-                else:
-                    print(f"✗ Failed: {result['error']}")
-
-            elif choice == "3":
-                # Read email
-                message_id = input("Message ID: ").strip()
-
-                result = await self.server.mcp.tools[3]._func(
-                    message_id=message_id
-                )
-
-                if result['success']:
-                    print(f"\n✓ Email Details:")
-                    print(f"  From: {result['headers'].get('From', 'N/A')}")
-                    print(f"  To: {result['headers'].get('To', 'N/A')}")
-                    print(f"  Subject: {result['headers'].get('Subject', 'N/A')}")
-                    print(f"  Date: {result['headers'].get('Date', 'N/A')}")
-                    print(f"\n  Body:\n{result['body'][:500]}...")
-                else:
-                    print(f"✗ Failed: {result['error']}")
-
-            elif choice == "4":
-                # List labels
-                await self.test_list_labels()
-
-            elif choice == "5":
-                # Create label
-                name = input("Label name: ").strip()
-
-                result = await self.server.mcp.tools[8]._func(name=name)
-
-                if result['success']:
-                    print(f"✓ Label created: {result['name']} (ID: {result['labelId']})")
-                else:
-                    print(f"✗ Failed: {result['error']}")
-
-            elif choice == "6":
-                # Get profile
-                await self.test_get_profile()
-
-            elif choice == "7":
-                # Create draft
-                to = input("To (email address): ").strip()
-                subject = input("Subject: ").strip()
-                body = input("Body: ").strip()
-
-                result = await self.server.mcp.tools[1]._func(
-                    to=to, subject=subject, body=body
-                )
-
-                if result['success']:
-                    print(f"✓ Draft created! Draft ID: {result['draftId']}")
-                else:
-                    print(f"✗ Failed: {result['error']}")
-
-            elif choice == "8":
-                # Get thread
-                thread_id = input("Thread ID: ").strip()
-
-                result = await self.server.mcp.tools[5]._func(
-                    thread_id=thread_id
-                )
-
-                if result['success']:
-                    print(f"\n✓ Thread contains {result['messageCount']} messages:")
-                    for i, msg in enumerate(result['messages'], 1):
-                        print(f"\n  Message {i}:")
-                        print(f"    From: {msg['from']}")
-                        print(f"    Date: {msg['date']}")
-                        print(f"    Snippet: {msg['snippet'][:100]}...")
-                else:
-                    print(f"✗ Failed: {result['error']}")
-
-            elif choice == "9":
-                # Run all tests
-                await self.run_all_tests()
-
+            handler = handlers.get(choice)
+            if handler:
+                await handler()
             else:
                 print("Invalid choice. Please try again.")
 
@@ -368,10 +503,18 @@ async def main():
     """Main entry point for testing"""
     tester = GmailMCPTester()
 
-    if len(sys.argv) > 1 and sys.argv[1] == "--interactive":
-        await tester.interactive_test()
-    else:
-        await tester.run_all_tests()
+    # authenticate() keeps one keep-alive connection pool for every test;
+    # close it once the run is over
+    try:
+        await tester.setup()
+        if len(sys.argv) > 1 and sys.argv[1] == "--interactive":
+            await tester.interactive_test()
+        elif len(sys.argv) > 1 and sys.argv[1] == "--cleanup-test-labels":
+            await tester.cleanup_test_labels()
+        else:
+            await tester.run_all_tests()
+    finally:
+        tester.server.close()
 
 
 if __name__ == "__main__":
@@ -380,6 +523,7 @@ if __name__ == "__main__":
     print("\nUsage:")
     print("  python test_gmail_mcp.py           # Run all tests")
     print("  python test_gmail_mcp.py --interactive  # Interactive mode")
+    print("  python test_gmail_mcp.py --cleanup-test-labels  # Delete leftover test labels")
     print()
 
     asyncio.run(main())
\ No newline at end of file
@@ -4,10 +4,42 @@ Update credentials.json with proper redirect URIs for OAuth flow
 This fixes common OAuth 400 errors
 """
 
+import os
 import json
 import sys
-import shutil
 from datetime import datetime
+from pathlib import Path
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+CREDENTIALS_PATH = Path('credentials.json')
+
+# Redirect URIs for desktop app and web app OAuth clients
+INSTALLED_REDIRECT_URIS = (
+    "http://localhost",
+    "http://localhost:8080",
+    "http://localhost:8080/",
+    "http://127.0.0.1",
+    "http://127.0.0.1:8080",
+    "http://127.0.0.1:8080/",
+    "urn:ietf:wg:oauth:2.0:oob",
+    "urn:ietf:wg:oauth:2.0:oob:auto"
+)
+WEB_REDIRECT_URIS = (
+    "http://localhost:8080",
+    "http://localhost:8080/",
+    "http://127.0.0.1:8080",
+    "http://127.0.0.1:8080/"
+)
+
+def _dump_json(data):
+    """Serialize data as indented JSON bytes, the layout credentials.json is kept in"""
+    if orjson:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    return json.dumps(data, indent=2).encode('utf-8')
 
 def update_redirect_uris():
     """Update redirect URIs in credentials.json to fix OAuth issues"""
@@ -15,30 +47,17 @@ def update_redirect_uris():
     print("Updating credentials.json with proper redirect URIs...")
 
     try:
-        # Backup original file
-        backup_name = f"credentials.json.backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        shutil.copy2('credentials.json', backup_name)
-        print(f"✅ Created backup: {backup_name}")
-
         # Load credentials
-        with open('credentials.json', 'r') as f:
-            creds = json.load(f)
+        original = CREDENTIALS_PATH.read_bytes()
+        creds = orjson.loads(original) if orjson else json.loads(original)
 
         # Determine client type and update redirect URIs
         if 'installed' in creds:
             print("Desktop application client detected")
 
             # Update redirect URIs for desktop app
-            creds['installed']['redirect_uris'] = [
-                "http://localhost",
-                "http://localhost:8080",
-                "http://localhost:8080/",
-                "http://127.0.0.1",
-                "http://127.0.0.1:8080",
-                "http://127.0.0.1:8080/",
-                "urn:ietf:wg:oauth:2.0:oob",
-                "urn:ietf:wg:oauth:2.0:oob:auto"
-            ]
+            redirect_uris = INSTALLED_REDIRECT_URIS
+            creds['installed']['redirect_uris'] = list(redirect_uris)
 
             print("✅ Updated redirect URIs for desktop application")
 
@@ -46,34 +65,34 @@ def update_redirect_uris():
             print("Web application client detected")
 
             # For web app, we need different URIs
-            if 'redirect_uris' not in creds['web']:
-                creds['web']['redirect_uris'] = []
-
-            creds['web']['redirect_uris'] = [
-                "http://localhost:8080",
-                "http://localhost:8080/",
-                "http://127.0.0.1:8080",
-                "http://127.0.0.1:8080/"
-            ]
+            redirect_uris = WEB_REDIRECT_URIS
+            creds['web']['redirect_uris'] = list(redirect_uris)
 
             print("✅ Updated redirect URIs for web application")
         else:
             print("❌ Unknown client type in credentials.json")
             return False
 
-        # Save updated credentials
-        with open('credentials.json', 'w') as f:
-            json.dump(creds, f, indent=2)
-
-        print("✅ Successfully updated credentials.json")
+        updated = _dump_json(creds)
+        if updated == original:
+            print("✅ credentials.json already has these redirect URIs")
+        else:
+            # Backup original file
+            backup_name = f"credentials.json.backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            Path(backup_name).write_bytes(original)
+            print(f"✅ Created backup: {backup_name}")
+
+            # Save updated credentials; the rename means a crash mid-write
+            # can't leave a truncated credentials.json behind
+            tmp_path = CREDENTIALS_PATH.with_name(CREDENTIALS_PATH.name + '.tmp')
+            tmp_path.write_bytes(updated)
+            os.replace(tmp_path, CREDENTIALS_PATH)
+
+            print("✅ Successfully updated credentials.json")
         print("\nUpdated redirect URIs:")
 
-        if 'installed' in creds:
-            for uri in creds['installed']['redirect_uris']:
-                print(f"  - {uri}")
-        elif 'web' in creds:
-            for uri in creds['web']['redirect_uris']:
-                print(f"  - {uri}")
+        for uri in redirect_uris:
+            print(f"  - {uri}")
 
         print("\n⚠️  IMPORTANT: You must also update these URIs in Google Cloud Console!")
         print("1. Go to: https://console.cloud.google.com/")
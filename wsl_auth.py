@@ -4,31 +4,65 @@ WSL-friendly Gmail OAuth Authentication
 Handles authentication without trying to open browser
 """
 
-import os
 import json
 import sys
-from google.oauth2.credentials import Credentials
-from google.auth.transport.requests import Request
-from google_auth_oauthlib.flow import InstalledAppFlow
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 SCOPES = ['https://www.googleapis.com/auth/gmail.modify']
 
+# An access token with less lifetime than this left is treated as expired
+TOKEN_EXPIRY_MARGIN = timedelta(minutes=5)
+
+def _token_still_valid(data):
+    """Check the saved access token's expiry without building Credentials"""
+    if not data.get('token') or not data.get('expiry'):
+        return False
+    try:
+        # google-auth writes expiry as naive UTC with a trailing Z
+        expiry = datetime.fromisoformat(data['expiry'].rstrip('Z'))
+    except ValueError:
+        return False
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return expiry - now > TOKEN_EXPIRY_MARGIN
+
 def main():
     creds = None
+    token_path = Path('token.json')
 
     # Check for existing token
-    if os.path.exists('token.json'):
-        with open('token.json', 'r') as token:
-            creds = Credentials.from_authorized_user_info(json.load(token), SCOPES)
-            print("✓ Found existing token")
-
-    # Check if token needs refresh
+    token_data = None
+    if token_path.exists():
+        raw = token_path.read_bytes()
+        token_data = orjson.loads(raw) if orjson else json.loads(raw)
+        print("✓ Found existing token")
+
+        # Check if token needs refresh; a still-valid token needs none of
+        # the google-auth machinery
+        if _token_still_valid(token_data):
+            print("✅ Token is valid! You're already authenticated.")
+            return
+
+    from google.oauth2.credentials import Credentials
+    from google.auth.transport.requests import Request
+    from google_auth_oauthlib.flow import InstalledAppFlow
+
+    if token_data is not None:
+        creds = Credentials.from_authorized_user_info(token_data, SCOPES)
+
+    # The fast check above is stricter than google-auth's, so a token it
+    # rejected (close to expiry, or saved without one) may still be usable
     if creds and creds.valid:
         print("✅ Token is valid! You're already authenticated.")
         return
 
-    if creds and creds.expired and creds.refresh_token:
-        print("Refreshing expired token...")
+    if creds and creds.refresh_token:
+        print("Refreshing token...")
         creds.refresh(Request())
     else:
         print("Starting new OAuth flow...")
@@ -73,8 +107,7 @@ def main():
             sys.exit(1)
 
     # Save the token
-    with open('token.json', 'w') as token:
-        token.write(creds.to_json())
+    token_path.write_text(creds.to_json(), encoding='utf-8')
 
     print("✅ Authentication complete! Token saved to token.json")
     print("You can now run: python3 gmail_mcp_server.py")